@@ -0,0 +1,61 @@
+"""
+Compare the matcher backends (and the prefilter) parsing and searching
+Bible references in synthetic text.
+"""
+
+import argparse, random, time
+
+from bible_reference import BibleReferenceParser
+from bible_reference.backends import available_backends
+from bible_reference.naming_schemes import RGG_abbr, RGG, Luther84, \
+    Luther84_abbr, SBL, SBL_abbr
+
+naming_schemes = [ RGG_abbr, Luther84, Luther84_abbr, SBL_abbr, RGG, SBL, ]
+
+references = [ "Gen 1,1", "Röm 3,22", "1. Kor 13,1-3", "2Kor 5,17",
+               "1 Sam 3,1-4,2", "Joh 3,16f", "Ps 23", "Ps 119,105",
+               "Joel 2,28", "Phil 2,5-11", "Mt 5,3 (vgl. 6,1)", "Rom 8:28",
+               "1 Cor 13:13", "Lk 2,1-20; 3,1", ]
+
+words = ( "Und es begab sich aber zu der Zeit dass ein Gebot von dem "
+          "Kaiser Augustus ausging dass alle Welt geschätzt würde Diese "
+          "Schätzung war die allererste und geschah zur Zeit da Quirinius "
+          "Statthalter in Syrien war" ).split()
+
+def timed(function, repeat):
+    best = None
+    for a in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-w", "--words", type=int, default=200000,
+                        help="Number of words in the synthetic text.")
+    parser.add_argument("-d", "--density", type=float, default=0.01,
+                        help="Share of references among the words.")
+    parser.add_argument("-r", "--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    random.seed(0)
+    text = " ".join([ random.choice(references)
+                      if random.random() < args.density
+                      else random.choice(words)
+                      for a in range(args.words) ])
+    rows = references * 1000
+
+    print("%-16s %12s %12s" % ( "backend", "finditer [s]", "parse [s]", ))
+    for name in available_backends():
+        for prefilter in ( False, True, ):
+            brp = BibleReferenceParser(naming_schemes, backend=name,
+                                       prefilter=prefilter)
+            search = timed(lambda: list(brp.finditer(text)), args.repeat)
+            parse = timed(lambda: [ brp.parse(s) for s in rows ], args.repeat)
+            label = name + (" +prefilter" if prefilter else "")
+            print("%-16s %12.3f %12.3f" % ( label, search, parse, ))
+
+main()
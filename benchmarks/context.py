@@ -0,0 +1,96 @@
+"""
+Compare a compiled Context with separate naming schemes and canons:
+the memory used by the lookup structures (measured with tracemalloc)
+and the speed of book name lookups, parsing and representation.
+"""
+
+import argparse, time, tracemalloc
+
+from bible_reference.bible_reference import NamingScheme, Canon, \
+    BibleReferenceParser, _resolve_book
+from bible_reference.context import Context
+
+scheme_names = [ ( "RGG_abbr", ",", ), ( "RGG", ",", ),
+                 ( "Luther84", ",", ), ( "Luther84_abbr", ",", ),
+                 ( "SBL", ":", ), ( "SBL_abbr", ":", ), ]
+canon_names = [ "default", "KingJames", "BHS", "LXX", ]
+
+# Found in the first, middle and last naming schemes.
+names = [ ( None, "Röm", ), ( "1", "Kor", ), ( None, "Römer", ),
+          ( None, "Offenbarung", ), ( None, "Rom", ), ( "1", "Cor", ),
+          ( None, "Gen", ), ( None, "Song", ), ]
+references = [ "Röm 3,22", "1. Kor 13,1-3", "Römer 8,28", "Rom 8:28",
+               "1 Cor 13:13", "Offenbarung 21", "Gen 1,1", "Ps 23", ]
+
+def load():
+    schemes = [ NamingScheme.internal(name, ".", delimiter)
+                for name, delimiter in scheme_names ]
+    canons = [ Canon(name) for name in canon_names ]
+    return schemes, canons
+
+def measure(f):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    ret = f()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum([ stat.size_diff for stat in after.compare_to(before,
+                                                             "filename") ])
+    return ret, size
+
+def timed(what, f, n):
+    start = time.perf_counter()
+    for i in range(n):
+        f()
+    elapsed = time.perf_counter() - start
+    print("  %-34s %10.0f/s" % ( what, n / elapsed, ))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--rounds", type=int, default=20000)
+    args = parser.parse_args()
+
+    def separate():
+        schemes, canons = load()
+        for ns in schemes:
+            ns.intid_by_name
+        return schemes, canons
+
+    def compiled():
+        schemes, canons = load()
+        return Context(schemes, canons)
+
+    ( schemes, canons, ), separate_size = measure(separate)
+    context, context_size = measure(compiled)
+    schemes, canons = context.naming_schemes, context.canons
+    print("Memory")
+    print("  naming schemes with their indices %8i kB" % (
+        separate_size // 1024))
+    print("  naming schemes and Context        %8i kB" % (
+        context_size // 1024))
+
+    print("Book name lookups")
+    timed("naming schemes",
+          lambda: [ _resolve_book(o, name, schemes) for o, name in names ],
+          args.rounds)
+    timed("Context",
+          lambda: [ context.resolve_book(o, name) for o, name in names ],
+          args.rounds)
+
+    plain = BibleReferenceParser(schemes, canons[0])
+    parsed = [ plain.parse(s) for s in references ]
+    print("Parsing")
+    timed("BibleReferenceParser",
+          lambda: [ plain.parse(s) for s in references ], args.rounds // 4)
+    timed("Context.parser()",
+          lambda: [ context.parser().parse(s) for s in references ],
+          args.rounds // 4)
+
+    ns = schemes[-1]
+    print("Representation")
+    timed("represent_using()",
+          lambda: [ br.represent_using(ns) for br in parsed ], args.rounds)
+    timed("Context.represent()",
+          lambda: [ context.represent(br, ns) for br in parsed ], args.rounds)
+
+main()
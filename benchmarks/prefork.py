@@ -0,0 +1,91 @@
+"""
+Measure the memory each pre-forked worker process does not share with
+its parent, with and without bible_reference.prewarm() in the parent.
+Linux only (reads /proc/self/smaps_rollup).
+"""
+
+import argparse, os, json
+
+def private_kb():
+    """
+    Return the size of the current process’ private (unshared) pages
+    in kB.
+    """
+    ret = 0
+    with open("/proc/self/smaps_rollup") as fp:
+        for line in fp:
+            if line.startswith("Private_"):
+                ret += int(line.split()[1])
+    return ret
+
+def work():
+    from bible_reference import cached_parser
+    from bible_reference.naming_schemes import RGG_abbr, Luther84, \
+        Luther84_abbr, SBL_abbr
+
+    parser = cached_parser([ RGG_abbr, Luther84, Luther84_abbr, SBL_abbr, ])
+    for s in ( "Gen 1,1", "Röm 3,22", "1. Kor 13,1-3", "Offb. 21", ):
+        parser.parse(s).represent_using(SBL_abbr)
+
+def run(workers, warm):
+    import bible_reference
+    from bible_reference.naming_schemes import RGG_abbr, Luther84, \
+        Luther84_abbr, SBL_abbr
+
+    if warm:
+        bible_reference.prewarm([ [ RGG_abbr, Luther84, Luther84_abbr,
+                                    SBL_abbr, ], ])
+
+    children = []
+    for a in range(workers):
+        read, write = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read)
+            before = private_kb()
+            work()
+            after = private_kb()
+            os.write(write, json.dumps([ before, after, ]).encode("ascii"))
+            os._exit(0)
+        else:
+            os.close(write)
+            children.append(( pid, read, ))
+
+    ret = []
+    for pid, read in children:
+        with os.fdopen(read) as fp:
+            ret.append(json.loads(fp.read()))
+        os.waitpid(pid, 0)
+
+    return ret
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-w", "--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    # Run each configuration in a fresh process of its own.
+    results = {}
+    for warm in ( False, True, ):
+        read, write = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read)
+            os.write(write, json.dumps(run(args.workers, warm)).encode())
+            os._exit(0)
+        os.close(write)
+        with os.fdopen(read) as fp:
+            results[warm] = json.loads(fp.read())
+        os.waitpid(pid, 0)
+
+    print("%-10s %22s" % ( "parent", "private kB per worker", ))
+    for warm in ( False, True, ):
+        average = sum([ after for before, after in results[warm] ]) \
+            / len(results[warm])
+        print("%-10s %22.0f" % ( "prewarmed" if warm else "cold", average, ))
+
+    saved = ( sum([ a for b, a in results[False] ])
+              - sum([ a for b, a in results[True] ]) ) / args.workers
+    print("Saved per worker: %.0f kB" % saved)
+
+main()
@@ -0,0 +1,112 @@
+"""
+Fill an SQLite database file with a million Bible references, create
+expression indexes using the functions from bible_reference.sqlite
+and time sorted and range queries with them.
+"""
+
+import argparse, os, os.path as op, random, shutil, sqlite3, tempfile, time
+
+from bible_reference import BibleReference
+from bible_reference.naming_schemes import RGG_abbr, Luther84, \
+    Luther84_abbr, SBL_abbr
+from bible_reference.sqlite import register_functions, end_key
+
+books = [ "Gen", "Ex", "Ps", "Jes", "Jer", "Mt", "Mk", "Lk", "Joh",
+          "Röm", "1Kor", "2Kor", "Gal", "Eph", "Phil", "Offb", ]
+
+def reference(rnd):
+    ret = "%s %i" % ( rnd.choice(books), rnd.randint(1, 20), )
+    kind = rnd.random()
+    if kind < 0.6:
+        ret += ",%i" % rnd.randint(1, 30)
+    elif kind < 0.8:
+        v = rnd.randint(1, 25)
+        ret += ",%i-%i" % ( v, v + rnd.randint(1, 5), )
+    elif kind < 0.9:
+        ret += "f"
+    return ret
+
+class Timer:
+    def __init__(self, what):
+        self.what = what
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        print("%-40s %8.2fs" % ( self.what,
+                                 time.perf_counter() - self.start, ))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--rows", type=int, default=1000000)
+    parser.add_argument("-f", "--file", default=None,
+                        help="Database file (default: a temporary one)")
+    args = parser.parse_args()
+
+    if args.file is None:
+        directory = tempfile.mkdtemp()
+        path = op.join(directory, "bibref.sqlite")
+    else:
+        path = args.file
+        if op.exists(path):
+            os.unlink(path)
+
+    conn = sqlite3.connect(path)
+    register_functions(conn, [ RGG_abbr, Luther84, Luther84_abbr, ],
+                       output_scheme=SBL_abbr)
+
+    rnd = random.Random(1)
+    with Timer("insert %i rows" % args.rows):
+        conn.execute("CREATE TABLE refs (id INTEGER PRIMARY KEY, "
+                     "                   reference TEXT)")
+        conn.executemany("INSERT INTO refs (reference) VALUES (?)",
+                         ( ( reference(rnd), ) for i in range(args.rows) ))
+        conn.commit()
+
+    with Timer("create index on bibref_index()"):
+        conn.execute("CREATE INDEX refs_index "
+                     "    ON refs(bibref_index(reference))")
+    with Timer("create index on bibref_start/end()"):
+        conn.execute("CREATE INDEX refs_span "
+                     "    ON refs(bibref_start(reference), "
+                     "            bibref_end(reference))")
+        conn.commit()
+
+    order_by = ("SELECT reference FROM refs "
+                " ORDER BY bibref_index(reference) LIMIT 1000 OFFSET %i" %
+                (args.rows // 2))
+    with Timer("ORDER BY bibref_index(), 1000 rows"):
+        rows = conn.execute(order_by).fetchall()
+
+    br = BibleReference.parse("Joh 3,16", [ RGG_abbr, ])
+    overlapping = ("SELECT count(*) FROM refs "
+                   " WHERE bibref_start(reference) BETWEEN ? AND ? "
+                   "   AND bibref_end(reference) >= ?")
+    # Nothing in the data spans more than a chapter.
+    lower = br.int_sort_index() - (1 << 8)
+    with Timer("range query Joh 3,16"):
+        count, = conn.execute(overlapping, ( lower, end_key(br),
+                                             br.int_sort_index(), )).fetchone()
+    print("  %i rows" % count)
+
+    with Timer("same without index (full scan)"):
+        count2, = conn.execute(
+            "SELECT count(*) FROM refs "
+            " WHERE +bibref_start(reference) <= ? "
+            "   AND +bibref_end(reference) >= ?",
+            ( end_key(br), br.int_sort_index(), )).fetchone()
+    assert count == count2, ( count, count2, )
+
+    for sql in ( order_by, overlapping, ):
+        for row in conn.execute("EXPLAIN QUERY PLAN " + sql,
+                                ( () if sql is order_by
+                                  else ( 0, 0, 0, ) )):
+            print("  plan:", row[-1])
+
+    conn.close()
+    print("Database file: %i MB" % ( op.getsize(path) // 1000000, ))
+    if args.file is None:
+        shutil.rmtree(directory)
+
+main()
@@ -0,0 +1,64 @@
+"""
+Parse Bible references with one BibleReferenceParser shared by the
+threads of a ThreadPoolExecutor and report the throughput for an
+increasing number of threads. With the GIL, expect little scaling; on
+a free-threaded Python build, throughput should grow with the number
+of cores.
+"""
+
+import argparse, os, sys, time
+from concurrent.futures import ThreadPoolExecutor
+
+from bible_reference import BibleReferenceParser
+from bible_reference.naming_schemes import RGG_abbr, Luther84, \
+    Luther84_abbr, SBL_abbr
+
+references = [ "Gen 1,1", "Röm 3,22", "1. Kor 13,1-3", "2Kor 5,17",
+               "1 Sam 3,1-4,2", "Joh 3,16f", "Ps 23", "Ps 119,105",
+               "Joel 2,28", "Phil 2,5-11", "Mt 5,3 (vgl. 6,1)", "Rom 8:28",
+               "1 Cor 13:13", "Lk 2,1-20; 3,1", "Gene 1,1", "Offb. 21", ]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--rows", type=int, default=200000,
+                        help="Number of references to parse per run.")
+    parser.add_argument("-t", "--max-threads", type=int,
+                        default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    # One parser for all threads. Its lazy parts are built by
+    # whichever thread gets there first.
+    brp = BibleReferenceParser([ RGG_abbr, Luther84, Luther84_abbr,
+                                 SBL_abbr, ])
+    rows = (references * (args.rows // len(references) + 1))[:args.rows]
+
+    def work(chunk):
+        return sum([ brp.parse(s).int_sort_index() for s in chunk ])
+
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print("Python %s, GIL %s" % ( sys.version.split()[0],
+                                  "enabled" if gil else "disabled", ))
+    print("%8s %14s %8s" % ( "threads", "references/s", "speedup", ))
+
+    threads = 1
+    base = None
+    while threads <= args.max_threads:
+        size = len(rows) // threads + 1
+        chunks = [ rows[i:i+size] for i in range(0, len(rows), size) ]
+
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            start = time.perf_counter()
+            results = list(executor.map(work, chunks))
+            elapsed = time.perf_counter() - start
+
+        rate = len(rows) / elapsed
+        if base is None:
+            base = rate
+            checksum = sum(results)
+        elif sum(results) != checksum:
+            raise AssertionError("Results differ between runs!")
+
+        print("%8i %14.0f %8.2f" % ( threads, rate, rate / base, ))
+        threads *= 2
+
+main()
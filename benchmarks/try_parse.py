@@ -0,0 +1,54 @@
+"""
+Parse dirty rows (by default, 30% of them not Bible references) with
+parse() catching BibleReferenceParseError and with try_parse(), and
+report the throughput of both.
+"""
+
+import argparse, time
+
+from bible_reference import BibleReferenceParser, BibleReferenceParseError
+from bible_reference.naming_schemes import RGG_abbr, Luther84
+
+good = [ "Gen 1,1", "Röm 3,22", "1. Kor 13,1-3", "Joh 3,16f", "Ps 23",
+         "Gene 1,1", "Offenb. 21", ]
+bad = [ "Xyz 3,1", "Je 3", "siehe oben", "", "Seite 12", ]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--rows", type=int, default=200000)
+    parser.add_argument("-f", "--failing", type=float, default=0.3,
+                        help="Fraction of rows that don’t parse.")
+    args = parser.parse_args()
+
+    nbad = int(args.rows * args.failing)
+    rows = [ bad[i % len(bad)] for i in range(nbad) ] + \
+           [ good[i % len(good)] for i in range(args.rows - nbad) ]
+
+    brp = BibleReferenceParser([ RGG_abbr, Luther84, ])
+
+    def with_exceptions():
+        ret = 0
+        for row in rows:
+            try:
+                brp.parse(row)
+                ret += 1
+            except BibleReferenceParseError:
+                pass
+        return ret
+
+    def without_exceptions():
+        ret = 0
+        for row in rows:
+            if brp.try_parse(row):
+                ret += 1
+        return ret
+
+    for name, f in ( ( "parse()", with_exceptions, ),
+                     ( "try_parse()", without_exceptions, ), ):
+        start = time.perf_counter()
+        parsed = f()
+        elapsed = time.perf_counter() - start
+        print("%-12s %8i parsed %12.0f rows/s" % ( name, parsed,
+                                                   len(rows) / elapsed, ))
+
+main()
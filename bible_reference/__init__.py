@@ -35,6 +35,16 @@ German.
 from .bible_reference import here, \
     Canon, NamingScheme, BiblicalBook, \
     BibleReference, BibleReferenceParser, \
-    CanonMismatch, BibleReferenceParseError, \
-    default_naming_scheme, default_canon
+    CanonMismatch, BibleReferenceParseError, AmbiguousBookName, \
+    default_naming_scheme, default_canon, cached_parser, \
+    ReferenceMatch, ParseFailure, NO_MATCH, UNKNOWN_BOOK, AMBIGUOUS_BOOK, \
+    BAD_NUMBER, TRAILING_GARBAGE
+
+def prewarm(parsers=(), freeze=True):
+    """
+    See prewarming.prewarm(). Imported on demand, since it loads all
+    the bundled canons and naming schemes.
+    """
+    from .prewarming import prewarm
+    return prewarm(parsers, freeze)
 
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; -*-
+
+##  Copyright 2018–20 by Diedrich Vorberg <diedrich@tux4web.de>
+##
+##  All Rights Reserved
+##
+##  For more Information on orm see the README file.
+##
+##  This program is free software; you can redistribute it and/or modify
+##  it under the terms of the GNU General Public License as published by
+##  the Free Software Foundation; either version 2 of the License, or
+##  (at your option) any later version.
+##
+##  This program is distributed in the hope that it will be useful,
+##  but WITHOUT ANY WARRANTY; without even the implied warranty of
+##  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##  GNU General Public License for more details.
+##
+##  You should have received a copy of the GNU General Public License
+##  along with this program; if not, write to the Free Software
+##  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+##
+##  I have added a copy of the GPL in the file COPYING
+
+"""
+Matcher backends compile the reference grammar into an object that
+provides match(s, pos) and finditer(s) returning match objects
+compatible with those of Python’s re module (groupdict(), start(),
+end(), span()). BibleReferenceParser accepts a backend object or one
+of the names in `backends`.
+"""
+
+from __future__ import print_function, unicode_literals
+import re
+
+class ReBackend:
+    """
+    The default backend using Python’s re module.
+    """
+    name = "re"
+
+    def compile(self, template, book_pattern):
+        """
+        @template: The reference grammar with a %s where the book name
+            pattern goes.
+        @book_pattern: Regular expression matching the book names
+            (without ordinals).
+        """
+        return re.compile(template % book_pattern, re.VERBOSE)
+
+class RegexBackend:
+    """
+    Use the third party `regex` module. The book name alternation is
+    wrapped in an atomic group, so the engine will not backtrack into
+    it. Since the alternatives are sorted longest first and no book
+    name is followed by a letter in a reference, that does not change
+    the result.
+    """
+    name = "regex"
+
+    def __init__(self):
+        try:
+            import regex
+        except ImportError:
+            raise ImportError("The regex backend requires the regex module "
+                              "(pip install bible_reference[regex]).")
+        self.regex = regex
+
+    def compile(self, template, book_pattern):
+        return self.regex.compile(template % ("(?>%s)" % book_pattern),
+                                  self.regex.VERBOSE | self.regex.VERSION0)
+
+backends = { "re": ReBackend,
+             "regex": RegexBackend, }
+
+default_backend = ReBackend()
+
+def get_backend(backend=None):
+    """
+    Return a backend object for `backend`, which may be None (the
+    default backend), a backend object or the name of one.
+    """
+    if backend is None:
+        return default_backend
+    elif isinstance(backend, str):
+        try:
+            return backends[backend]()
+        except KeyError:
+            raise ValueError("Unknown matcher backend: %s" % repr(backend))
+    else:
+        return backend
+
+def available_backends():
+    """
+    Return the names of the backends that can be used in this Python
+    installation.
+    """
+    ret = []
+    for name, cls in backends.items():
+        try:
+            cls()
+        except ImportError:
+            pass
+        else:
+            ret.append(name)
+
+    return ret
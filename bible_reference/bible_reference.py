@@ -29,9 +29,11 @@ schemes and the class that binds it all together: BibleReference.
 """
 
 from __future__ import print_function, unicode_literals
-import re, os.path as op, collections.abc, numbers, functools
+import re, os.path as op, collections.abc, numbers, functools, unicodedata
+import sys, threading, types
 
 from .infofile import Infofile
+from .backends import get_backend
 
 class CanonMismatch(Exception):
     """
@@ -43,6 +45,65 @@ class BibleReferenceParseError(Exception):
     Bible Reference Parse Error
     """
 
+class AmbiguousBookName(KeyError):
+    """
+    Raised by NamingScheme.intid_of() if an abbreviation matches more
+    than one book. The intids in question are in `candidates`.
+    """
+    def __init__(self, name, candidates):
+        KeyError.__init__(self, name)
+        self.name = name
+        self.candidates = candidates
+
+    def __str__(self):
+        return "%s could be any of %s" % ( repr(self.name),
+                                           ", ".join(self.candidates), )
+
+# Reasons for a ParseFailure.
+NO_MATCH = "no_match"
+UNKNOWN_BOOK = "unknown_book"
+AMBIGUOUS_BOOK = "ambiguous_book"
+BAD_NUMBER = "bad_number"
+TRAILING_GARBAGE = "trailing_garbage"
+
+class ParseFailure:
+    """
+    Returned instead of a BibleReference by BibleReferenceParser’s
+    try_parse() for input that can’t be parsed. It is false in a
+    boolean context.
+
+    @reason: One of NO_MATCH, UNKNOWN_BOOK, AMBIGUOUS_BOOK, BAD_NUMBER
+        and TRAILING_GARBAGE.
+    @offset: The position in the input where parsing failed: where
+        the book name starts for UNKNOWN_BOOK and AMBIGUOUS_BOOK (after
+        the ordinal), the number for BAD_NUMBER, the end of the
+        reference for TRAILING_GARBAGE and where the chapter was
+        expected for NO_MATCH (0 if there is no book name).
+    @message: A human-readable description as used by
+        BibleReferenceParseError.
+    @candidates: For AMBIGUOUS_BOOK, the intids the book name may
+        stand for.
+    """
+    __slots__ = ( "reason", "offset", "message", "candidates", )
+
+    def __init__(self, reason, offset, message, candidates=()):
+        self.reason = reason
+        self.offset = offset
+        self.message = message
+        self.candidates = candidates
+
+    def __bool__(self):
+        return False
+
+    def __repr__(self):
+        return "<ParseFailure %s at %i: %s>" % ( self.reason, self.offset,
+                                                 self.message, )
+
+# Guards the one-time creation of lazily built data structures
+# (indices, tries, naming schemes loaded on demand), so parsers may be
+# shared between threads. Once published, these are never modified.
+lazy_init_lock = threading.RLock()
+
 def here(filename, extension):
     if ("/") in filename:
         return filename
@@ -73,8 +134,9 @@ class Canon:
     """
     def __init__(self, name):
         self.name = name
+        # Interned, so all canons and naming schemes share the intids.
         self.book_ids = tuple(
-            [tpl[0] for tpl in Infofile(here(name, ".canon"))])
+            [sys.intern(tpl[0]) for tpl in Infofile(here(name, ".canon"))])
         self.index = dict(
             [(tpl[1], tpl[0],) for tpl in enumerate(self.book_ids)])
 
@@ -114,6 +176,27 @@ class BiblicalBook:
         assert other.canon == self.canon, CanonMismatch
         return self.canon.index[self.intid] > self.canon.index[other.intid]
 
+def normalize_name(name):
+    """
+    Return a normalized form of a book name for abbreviation lookups:
+    NFC normalized, casefolded and stripped of punctuation and
+    whitespace.
+    """
+    # Casefolding may undo the composition, so normalize twice.
+    name = unicodedata.normalize("NFC", name).casefold()
+    name = unicodedata.normalize("NFC", name)
+    return "".join([ ch for ch in name
+                     if not (ch.isspace()
+                             or unicodedata.category(ch).startswith("P")) ])
+
+class _TrieNode:
+    __slots__ = ( "children", "exact", "intids", )
+
+    def __init__(self):
+        self.children = {}
+        self.exact = set() # intids of the names ending here
+        self.intids = set() # intids of the names in this sub-trie
+
 class NamingScheme:
     """
     Return an intid for a Biblical book and provide unified
@@ -144,6 +227,7 @@ class NamingScheme:
         self.verse_delimiter = verse_delimiter
 
         self._intid_by_name = None
+        self._prefix_trie = None
 
     @classmethod
     def internal(cls, name, ordinal_delimiter=".", verse_delimiter=","):
@@ -176,7 +260,8 @@ class NamingScheme:
             fname = op.basename(filepath)
             name, ext = op.splitext(fname)
 
-        return cls(dict(Infofile(filepath)), name,
+        return cls(dict([ ( sys.intern(intid), name, )
+                          for intid, name in Infofile(filepath) ]), name,
                    ordinal_delimiter, verse_delimiter)
 
     @property
@@ -196,11 +281,96 @@ class NamingScheme:
             return (ordinal, name.capitalize()), intid,
 
         if self._intid_by_name is None:
-            self._intid_by_name = dict(
-                [item(tpl) for tpl in self.name_by_intid.items()])
+            with lazy_init_lock:
+                if self._intid_by_name is None:
+                    self._intid_by_name = types.MappingProxyType(dict(
+                        [item(tpl) for tpl in self.name_by_intid.items()]))
 
         return self._intid_by_name
 
+    @property
+    def prefix_trie(self):
+        """
+        On demand, this will create a prefix trie for each ordinal (or
+        None) of the normalized names (see normalize_name()). Each node
+        knows the intids of all the names below it.
+        """
+        if self._prefix_trie is None:
+            with lazy_init_lock:
+                if self._prefix_trie is None:
+                    self._prefix_trie = self._build_prefix_trie()
+
+        return self._prefix_trie
+
+    def _build_prefix_trie(self):
+        tries = {}
+        nodes = []
+        for intid, name in self.name_by_intid.items():
+            ordinal, name = ordinal_re.match(name).groups()
+            node = tries.setdefault(ordinal, _TrieNode())
+            nodes.append(node)
+            node.intids.add(intid)
+            for ch in normalize_name(name):
+                node = node.children.setdefault(ch, _TrieNode())
+                nodes.append(node)
+                node.intids.add(intid)
+            node.exact.add(intid)
+
+        # Freeze it.
+        for node in nodes:
+            node.intids = frozenset(node.intids)
+            node.exact = frozenset(node.exact)
+            node.children = types.MappingProxyType(node.children)
+
+        return types.MappingProxyType(tries)
+
+    def __getstate__(self):
+        # The indices can’t be pickled and are rebuilt on demand.
+        ret = self.__dict__.copy()
+        ret["_intid_by_name"] = None
+        ret["_prefix_trie"] = None
+        return ret
+
+    def candidates_of_abbreviation(self, ordinal, name):
+        """
+        Return a tuple of the intids an abbreviation of one of our
+        names (“Gene”, “deut”, “Offb.”) may stand for, found by walking
+        the prefix trie, that is, in time proportional to the length
+        of `name`. A normalized name that is known exactly wins over
+        longer names it is a prefix of. The tuple is empty for unknown
+        names.
+        """
+        if not ordinal:
+            ordinal = None
+
+        node = self.prefix_trie.get(ordinal)
+        key = normalize_name(name)
+        if node is None or not key:
+            return ()
+
+        for ch in key:
+            node = node.children.get(ch)
+            if node is None:
+                return ()
+
+        return tuple(sorted(node.exact or node.intids))
+
+    def intid_of_abbreviation(self, ordinal, name):
+        """
+        Resolve an abbreviation of one of our names (see
+        candidates_of_abbreviation()). Raises KeyError for unknown
+        names and AmbiguousBookName (a KeyError) if the abbreviation
+        matches several books.
+        """
+        intids = self.candidates_of_abbreviation(ordinal, name)
+        if not intids:
+            raise KeyError((ordinal or None, name,))
+        elif len(intids) > 1:
+            raise AmbiguousBookName(name, intids)
+        else:
+            intid, = intids
+            return intid
+
     def name_for(self, biblical_book):
         """
         Return the pretty name for a BiblicalBook object.
@@ -215,10 +385,18 @@ class NamingScheme:
             return our_name
 
     def intid_of(self, ordinal, name):
+        """
+        Return the intid for a book name, which may also be an
+        unambiguous abbreviation of one of our names. May raise
+        KeyError or AmbiguousBookName (see intid_of_abbreviation()).
+        """
         if not ordinal:
             ordinal = None
 
-        return self.intid_by_name[(ordinal, name.capitalize(),)]
+        try:
+            return self.intid_by_name[(ordinal, name.capitalize(),)]
+        except KeyError:
+            return self.intid_of_abbreviation(ordinal, name)
 
     def book_named(self, ordinal, name, canon):
         """
@@ -251,17 +429,25 @@ _bible_reference_re_tmpl = r"""
                                           # Buch (das wird aus der DB gebaut!!)
   \s*
   (?P<moreStart>\([^\)]+\)[,;]\s*)?       # Eine Kapitel- oder Versangabe
-                                          # in Klammern *vor* der eigentlichen
-                                          # Bibelstelle zählt nicht fürs Parsen.
+                                          # in Klammern *vor* der
+                                          # eigentlichen Bibelstelle
+                                          # zählt nicht fürs Parsen.
   (?P<range>
     (?P<parsable_range>
     \(?
     (?P<chapter>[0-9]+)                   # Kapitel
-    (?:                                   # Alles nach dem Kapitel ist optional.
-      (?:[,:]\(?(?P<v_start>\d+[ab]?)[-–](?P<c_end>\d+[ab]?),(?P<v_end>\d+[ab]?)\)?)   # Röm 3,1-3,3
-      |(?:[,:]\(?(?P<verse_range>\d+[ab]?)[-–](?P<verse_range_end>\d+[ab]?)) # Röm 3,1-3
-      |(?:[,:]\(?(?P<verse>\d+[ab]?)f{0,2}\)?)                            # Röm 3,1
-      |(?:[-–](?P<chapter_range>\d+[ab]?)f{0,2})                          # Röm 1-3
+    (?:                                   # Alles nach dem Kapitel
+                                          # ist optional.
+      # Röm 3,1-3,3
+      (?:[,:]\(?(?P<v_start>\d+[ab]?)[-–](?P<c_end>\d+[ab]?),
+             (?P<v_end>\d+[ab]?)\)?)
+      # Röm 3,1-3
+      |(?:[,:]\(?(?P<verse_range>\d+[ab]?)[-–]
+              (?P<verse_range_end>\d+[ab]?))
+      # Röm 3,1
+      |(?:[,:]\(?(?P<verse>\d+[ab]?)f{0,2}\)?)
+      # Röm 1-3
+      |(?:[-–](?P<chapter_range>\d+[ab]?)f{0,2})
     )?                                    # …„nach dem Kapitel“-Gruppe
     \)?
     ) # parsable_range
@@ -271,12 +457,22 @@ _bible_reference_re_tmpl = r"""
 )
 """
 
-def bible_reference_re(naming_schemes=None):
+# The groups of the grammar that contain chapter or verse numbers.
+_number_groups = ( "chapter", "v_start", "c_end", "v_end", "verse_range",
+                   "verse_range_end", "verse", "chapter_range", )
+
+# A word, optionally followed by a period, as in “Offb.”
+_abbreviation_pattern = r"[^\W\d_]+\.?"
+
+# The grammar up to the chapter, with any word as the book name. Where
+# this ends is where a reference that doesn’t match stopped matching.
+_book_part_re = re.compile(r"(?:\d[\.\s]?\s*)?" + _abbreviation_pattern
+                           + r"\s*(?:\([^\)]+\)[,;]\s*)?")
+
+def book_names(naming_schemes=None):
     """
-    Return a regular expression object matching Bible references that
-    use names from any of the naming schemes. Ordinals will not be
-    checked (“9.Cor” will match) nor key plausibility (meaning,
-    ambigious naming schemes will yield undefined results).
+    Return the set of book names (without ordinals) used by any of the
+    naming schemes.
     """
     if naming_schemes is None:
         naming_schemes = [ default_naming_scheme, ]
@@ -287,8 +483,26 @@ def bible_reference_re(naming_schemes=None):
         without_ordinals = [ordinal_name[1] for ordinal_name in pairs]
         names = names.union(set(without_ordinals))
 
-    names = "|".join(names)
-    return re.compile(_bible_reference_re_tmpl % names, re.VERBOSE)
+    return names
+
+def _literal_length(name):
+    # Whitespace in a book name is ignored by the verbose regex.
+    return len("".join(name.split()))
+
+def bible_reference_re(naming_schemes=None, backend=None):
+    """
+    Return a regular expression object matching Bible references that
+    use names from any of the naming schemes. Ordinals will not be
+    checked (“9.Cor” will match) nor key plausibility (meaning,
+    ambigious naming schemes will yield undefined results).
+
+    The names are tried longest first. The `backend` (see backends.py)
+    compiles the expression and defaults to Python’s re module.
+    """
+    names = sorted(book_names(naming_schemes),
+                   key=lambda name: (-_literal_length(name), name,))
+    return get_backend(backend).compile(_bible_reference_re_tmpl,
+                                        "|".join(names))
 
 
 class BibleReferenceParser:
@@ -297,7 +511,22 @@ class BibleReferenceParser:
     regular expression is constructed. For efficiency, this may be
     stored as a parser object.
     """
-    def __init__(self, naming_schemes=None, canon=default_canon):
+    def __init__(self, naming_schemes=None, canon=default_canon,
+                 prefilter=False, backend=None):
+        """
+        @naming_schemes: List of NamingScheme objects, defaults to
+            bible_reference.default_naming_scheme.
+        @canon: The canon that will be associated with the bible
+            references returned. Defaults to the default canon.
+        @prefilter: If True, finditer() will look for book names
+            using an Aho–Corasick automaton first and try the regular
+            expression only where a reference may start. That is a lot
+            faster on text that contains few references. The results
+            are identical.
+        @backend: Matcher backend used to compile the grammar, either a
+            backend object or its name (“re”, “regex”). Defaults to
+            Python’s re module. See backends.py.
+        """
         if naming_schemes is None:
             self.naming_schemes = [ default_naming_scheme, ]
         else:
@@ -305,27 +534,287 @@ class BibleReferenceParser:
 
         self.canon = canon
 
-        self.regex = bible_reference_re(self.naming_schemes)
+        self.backend = get_backend(backend)
+        self.regex = bible_reference_re(self.naming_schemes, self.backend)
+        self._abbreviation_regex = None
+
+        if prefilter:
+            from .prefilter import BookNamePrefilter
+            self.prefilter = BookNamePrefilter(book_names(self.naming_schemes))
+        else:
+            self.prefilter = None
 
     def parse(self, s):
         """
         Parse s into a BibleReference object. May raise ParseError.
         """
-        match = self.regex.match(s)
-        if match is None:
+        ret = self.try_parse(s)
+        if ret:
+            return ret
+        elif ret.reason == NO_MATCH:
             raise BibleReferenceParseError(s)
         else:
-            return BibleReference._from_match(
-                match, self.naming_schemes, self.canon)
+            raise BibleReferenceParseError(ret.message)
+
+    def try_parse(self, s, strict=False):
+        """
+        Like parse(), but return a ParseFailure instead of raising an
+        exception. Telling a failure from a BibleReference is a matter
+        of its truth value. With many rows that don’t parse, this is
+        a lot faster than catching BibleReferenceParseError.
+
+        @param strict: Also fail with BAD_NUMBER for chapters and
+            verses that are 0 or larger than 255 (which int_sort_index()
+            can’t represent) and with TRAILING_GARBAGE if anything but
+            whitespace follows the reference.
+        """
+        match = self.regex.match(s)
+        if match is None:
+            match = self.abbreviation_regex.match(s)
+
+        if match is None:
+            book_part = _book_part_re.match(s)
+            return ParseFailure(NO_MATCH,
+                                0 if book_part is None else book_part.end(),
+                                "Not a Bible reference: %s" % s)
+
+        if strict:
+            for group in _number_groups:
+                number = match.group(group)
+                if number is not None:
+                    n = int(number.rstrip("ab"))
+                    if n < 1 or n > 255:
+                        return ParseFailure(
+                            BAD_NUMBER, match.start(group),
+                            "Bad number: %s" % number)
+
+            end = match.end()
+            if s[end:].strip():
+                return ParseFailure(TRAILING_GARBAGE, end,
+                                    "Trailing garbage: %s" % s[end:])
+
+        return BibleReference._try_from_match(
+            match, self.naming_schemes, self.canon)
+
+    def parse_or_none(self, s, strict=False):
+        """
+        Return a BibleReference for s or None if it can’t be parsed
+        (see try_parse()).
+        """
+        return self.try_parse(s, strict) or None
+
+    @property
+    def abbreviation_regex(self):
+        """
+        The reference grammar with any word in place of the book
+        name. parse() falls back to this for book names that are not
+        spelled exactly as in our naming schemes. These are resolved as
+        abbreviations by the naming schemes.
+        """
+        if self._abbreviation_regex is None:
+            with lazy_init_lock:
+                if self._abbreviation_regex is None:
+                    self._abbreviation_regex = self.backend.compile(
+                        _bible_reference_re_tmpl, _abbreviation_pattern)
+        return self._abbreviation_regex
 
     def finditer(self, s):
         """
         Iterate over all bible references that can be found in s.
         """
-        for match in self.regex.finditer(s):
+        for match in self._finditer_matches(s):
             yield BibleReference._from_match(
                 match, self.naming_schemes, self.canon)
 
+    def finditer_spans(self, s, skip_unresolved=False):
+        """
+        Like finditer(), but yield ( start, end, BibleReference, )
+        tuples with the position of each reference in s.
+
+        @param skip_unresolved: Skip references whose book name can’t
+            be resolved instead of raising BibleReferenceParseError.
+        """
+        for match in self._finditer_matches(s):
+            br = BibleReference._try_from_match(
+                match, self.naming_schemes, self.canon)
+            if br:
+                yield ( match.start(), match.end(), br, )
+            elif not skip_unresolved:
+                raise BibleReferenceParseError(br.message)
+
+    def finditer_lazy(self, s):
+        """
+        Like finditer(), but yield ReferenceMatch records with the
+        position, book, chapter, verse and sort key of each reference.
+        This skips most of the work of constructing BibleReference
+        objects, which is what highlighting and linking need. May
+        raise BibleReferenceParseError for book names that can’t be
+        resolved, as finditer() does.
+        """
+        naming_schemes = self.naming_schemes
+        index = self.canon.index
+        for match in self._finditer_matches(s):
+            ordinal, name, chapter, verse, verse_range, v_start = match.group(
+                "ordinal", "book", "chapter", "verse", "verse_range",
+                "v_start")
+
+            intid, ambiguous = _resolve_book(ordinal, name, naming_schemes)
+            if intid is None:
+                # Let _from_match() raise the appropriate error.
+                BibleReference._from_match(match, naming_schemes, self.canon)
+
+            chapter = int(chapter)
+            verse = verse or verse_range or v_start
+            if verse is not None:
+                verse = int(verse.rstrip("ab"))
+
+            position = index.get(intid)
+            if position is None:
+                # The book is not part of the parser’s canon.
+                key = None
+            else:
+                key = sort_index(position, chapter, verse)
+            yield ReferenceMatch(match, intid, chapter, verse, key, self)
+
+    def _finditer_matches(self, s):
+        """
+        Iterate over the regular expression’s match objects for s. With
+        a prefilter, the regex is only tried anchored at the candidate
+        positions. Since every match starts at one of these, and a
+        match found anchored at a position is the match a search would
+        find there, the result is what regex.finditer() returns.
+        """
+        if self.prefilter is None:
+            for match in self.regex.finditer(s):
+                yield match
+        else:
+            pos = 0
+            for candidate in self.prefilter.candidates(s):
+                if candidate >= pos:
+                    match = self.regex.match(s, candidate)
+                    if match is not None:
+                        yield match
+                        pos = match.end()
+
+
+
+def _resolve_book(ordinal, name, naming_schemes):
+    """
+    Look up a book name as matched by the grammar in the naming
+    schemes, verbatim first, then as an abbreviation. Return a pair
+    ( intid, ambiguous, ), intid being None if the name can’t be
+    resolved. In that case, `ambiguous` holds the candidates of the
+    first naming scheme the name is ambiguous in or is empty.
+    """
+    if hasattr(naming_schemes, "resolve_book"):
+        # A compiled Context (see context.py).
+        return naming_schemes.resolve_book(ordinal, name)
+
+    ordinal = ordinal or None
+    key = ( ordinal, name.capitalize(), )
+    for ns in naming_schemes:
+        intid = ns.intid_by_name.get(key)
+        if intid is not None:
+            return intid, ()
+
+    return _resolve_abbreviation(ordinal, name, naming_schemes)
+
+def _resolve_abbreviation(ordinal, name, naming_schemes):
+    """
+    The second half of _resolve_book(): resolve `name` as an
+    abbreviation by the first naming scheme it is unambiguous in.
+    """
+    ambiguous = ()
+    for ns in naming_schemes:
+        intids = ns.candidates_of_abbreviation(ordinal, name)
+        if len(intids) == 1:
+            return intids[0], ()
+        elif intids and not ambiguous:
+            ambiguous = intids
+
+    return None, ambiguous
+
+class ReferenceMatch:
+    """
+    A Bible reference found by BibleReferenceParser.finditer_lazy():
+    its position in the string searched, the book’s intid, chapter and
+    verse (integers or None) and the canonical sort `key` (as in
+    BibleReference.int_sort_index(), None if the book is not part of
+    the parser’s canon). The BibleReference itself is
+    only constructed by reference().
+    """
+    __slots__ = ( "start", "end", "intid", "chapter", "verse", "key",
+                  "_match", "_parser", )
+
+    def __init__(self, match, intid, chapter, verse, key, parser):
+        self.start = match.start()
+        self.end = match.end()
+        self.intid = intid
+        self.chapter = chapter
+        self.verse = verse
+        self.key = key
+        self._match = match
+        self._parser = parser
+
+    def reference(self):
+        """
+        Return the BibleReference for this match.
+        """
+        return BibleReference._from_match(self._match,
+                                          self._parser.naming_schemes,
+                                          self._parser.canon)
+
+    def __repr__(self):
+        return "<ReferenceMatch %i:%i %s %s:%s>" % (
+            self.start, self.end, self.intid, self.chapter, self.verse, )
+
+
+# The parsers most recently used by cached_parser(), least recent first,
+# and those that are kept regardless.
+_parser_cache = collections.OrderedDict()
+parser_cache_size = 32
+_pinned_parsers = {}
+
+def cached_parser(naming_schemes=None, canon=default_canon, prefilter=False,
+                  backend=None, pin=False):
+    """
+    Return a BibleReferenceParser for these arguments, creating it on
+    first use only. Parsers are expensive to create and may be shared
+    (also between threads), so this is the way to get one in code that
+    is called often. The `parser_cache_size` most recently used
+    parsers are kept. For a Context, this is its parser().
+
+    @param pin: Keep this parser for the rest of the process, outside
+        the `parser_cache_size` limit (see prewarming.prewarm()).
+    """
+    if naming_schemes is None:
+        naming_schemes = [ default_naming_scheme, ]
+    elif hasattr(naming_schemes, "resolve_book"):
+        # A Context keeps its own parsers, which use its lookup.
+        return naming_schemes.parser(canon, prefilter, backend)
+
+    key = ( tuple(naming_schemes), canon, bool(prefilter), backend, )
+
+    ret = _pinned_parsers.get(key)
+    if ret is not None:
+        return ret
+
+    with lazy_init_lock:
+        ret = _parser_cache.get(key)
+        if ret is None:
+            ret = BibleReferenceParser(list(naming_schemes), canon,
+                                       prefilter, backend)
+            _parser_cache[key] = ret
+            while len(_parser_cache) > parser_cache_size:
+                _parser_cache.popitem(last=False)
+        else:
+            _parser_cache.move_to_end(key)
+
+        if pin:
+            _pinned_parsers[key] = ret
+            del _parser_cache[key]
+
+    return ret
 
 
 @functools.total_ordering
@@ -382,7 +871,7 @@ class BibleReference:
         @param canon: The canon that will be associated with the bible
             references returned. Defaults to the default canon.
         """
-        parser = BibleReferenceParser(naming_schemes, canon)
+        parser = cached_parser(naming_schemes, canon)
         return parser.parse(s)
 
     @classmethod
@@ -395,27 +884,40 @@ class BibleReference:
         @param canon: The canon that will be associated with the bible
             references returned. Defaults to the default canon.
         """
-        parser = BibleReferenceParser(naming_schemes, canon)
+        parser = cached_parser(naming_schemes, canon)
         for br in parser.finditer(s):
             yield br
 
     @classmethod
     def _from_match(BibleReference, match, naming_schemes, canon):
+        ret = BibleReference._try_from_match(match, naming_schemes, canon)
+        if not ret:
+            raise BibleReferenceParseError(ret.message)
+        return ret
+
+    @classmethod
+    def _try_from_match(BibleReference, match, naming_schemes, canon):
+        """
+        Return a BibleReference for a match of the grammar or a
+        ParseFailure if its book name can’t be resolved.
+        """
         groups = match.groupdict()
 
-        book = None
-        found_in_naming_scheme = naming_schemes[0]
-        for ns in naming_schemes:
-            try:
-                book = ns.book_named(groups["ordinal"], groups["book"], canon)
-                found_in_naming_scheme = ns
-                break
-            except KeyError:
-                pass
+        intid, ambiguous = _resolve_book(groups["ordinal"], groups["book"],
+                                         naming_schemes)
+        if intid is None:
+            if ambiguous:
+                return ParseFailure(
+                    AMBIGUOUS_BOOK, match.start("book"),
+                    "Ambiguous book: %s" % str(
+                        AmbiguousBookName(groups["book"], ambiguous)),
+                    ambiguous)
+            else:
+                return ParseFailure(
+                    UNKNOWN_BOOK, match.start("book"),
+                    "Unknown book: %(ordinal)s %(book)s" % groups)
 
-        if book is None:
-            raise BibleReferenceParseError(
-                "Unknown book: %(ordinal)s %(book)s" % groups)
+        book = BiblicalBook(intid, canon)
 
         chapter = groups["chapter"]
 
@@ -458,6 +960,44 @@ class BibleReference:
         range = range.replace(";", ",")
         self._range = range
 
+    # The parsable part of a (normalized) range.
+    _span_re = re.compile(r"""(?:\([^\)]+\)[,;]\s*)?\(?
+      (?P<chapter>\d+)[ab]?
+      (?:,\(?(?P<verse>\d+)[ab]?
+           (?:[-–](?P<end_chapter>\d+)[ab]?,(?P<end_verse>\d+)[ab]?
+             |[-–](?P<verse_end>\d+)[ab]?
+             |(?P<following>f{1,2}))?
+        |[-–](?P<chapter_end>\d+)[ab]?)?""", re.VERBOSE)
+
+    @property
+    def span_end(self):
+        """
+        Return the last ( chapter, verse, ) this reference covers, as
+        far as that can be told from its range. A verse of None means
+        “to the end of the chapter”, ( None, None, ) is the end of the
+        book. “3,16f” ends at 3,17, “3,16ff” at the end of chapter 3.
+        """
+        if self.chapter is None:
+            return ( None, None, )
+
+        match = self._span_re.match(self.range)
+        if match is None or int(match.group("chapter")) != self.chapter:
+            return ( self.chapter, self.verse, )
+
+        groups = match.groupdict()
+        if groups["end_chapter"] is not None:
+            return ( int(groups["end_chapter"]), int(groups["end_verse"]), )
+        elif groups["verse_end"] is not None:
+            return ( self.chapter, int(groups["verse_end"]), )
+        elif groups["following"] == "f":
+            return ( self.chapter, self.verse + 1, )
+        elif groups["following"] == "ff":
+            return ( self.chapter, None, )
+        elif groups["chapter_end"] is not None:
+            return ( int(groups["chapter_end"]), None, )
+        else:
+            return ( self.chapter, self.verse, )
+
     def __str__(self):
         """
         The default string representation
@@ -502,8 +1042,30 @@ class BibleReference:
         - 8bis chapter number
         - 8bits verse number
         """
-        b = self.book.canon.index[self.book.intid] + 1
-        c = self.chapter or 0
-        v = self.verse or 0
+        return sort_index(self.book.canon.index[self.book.intid],
+                          self.chapter, self.verse)
 
-        return b << 16 | c << 8 | v;
+def sort_index(position, chapter, verse):
+    """
+    Return the int_sort_index() of a reference given as numbers.
+
+    @param position: The book’s index in its canon.
+    @param chapter: Chapter number or None.
+    @param verse: Verse number or None.
+    """
+    return (position + 1) << 16 | (chapter or 0) << 8 | (verse or 0)
+
+def check_canon(reference, canon):
+    """
+    Raise CanonMismatch if `reference` does not belong to `canon`.
+    """
+    if reference.book.canon is not canon:
+        raise CanonMismatch("%s is not from canon %s" % (
+            repr(reference), canon.name, ))
+
+def _padded(length):
+    """
+    Round `length` up to a multiple of 8, the alignment of the sections
+    of the binary ReferenceTable and Concordance files.
+    """
+    return (length + 7) & ~7
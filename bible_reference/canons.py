@@ -48,3 +48,22 @@ Septuaginta. Edidit Alfred Rahlfs. Editio Quinta. Stuttgart, 1935;
 cf. `./LXX.canon`.
 """
 
+luther = Canon("luther")
+"""
+The order of the Luther Bible, 1984 edition; cf. `./luther.canon`.
+"""
+
+# All canons bundled with this package.
+bundled = ( default, king_hames, BHS, LXX, luther, )
+
+def by_name(name):
+    """
+    Return the Canon object for `name` from this module, so references
+    restored from files share the canons of those created at runtime.
+    Canons not defined here are loaded from their .canon file.
+    """
+    for canon in bundled:
+        if canon.name == name:
+            return canon
+
+    return Canon(name)
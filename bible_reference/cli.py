@@ -0,0 +1,288 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; -*-
+
+##  Copyright 2018–20 by Diedrich Vorberg <diedrich@tux4web.de>
+##
+##  All Rights Reserved
+##
+##  For more Information on orm see the README file.
+##
+##  This program is free software; you can redistribute it and/or modify
+##  it under the terms of the GNU General Public License as published by
+##  the Free Software Foundation; either version 2 of the License, or
+##  (at your option) any later version.
+##
+##  This program is distributed in the hope that it will be useful,
+##  but WITHOUT ANY WARRANTY; without even the implied warranty of
+##  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##  GNU General Public License for more details.
+##
+##  You should have received a copy of the GNU General Public License
+##  along with this program; if not, write to the Free Software
+##  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+##
+##  I have added a copy of the GPL in the file COPYING
+
+"""
+Find, normalize and sort Bible references in text files or stdin,
+line by line.
+
+  extract    write the references found as JSON lines with their
+             line number and offsets
+  normalize  write each line with the references in it represented
+             using the output naming scheme
+  keys       parse each line as one reference and prefix it with its
+             canonical sort key and a tab (lines that don’t parse get
+             an empty key)
+  sort       parse each line as one reference and write them in
+             canonical order, normalized (uses temporary files for
+             large inputs)
+"""
+
+from __future__ import print_function, unicode_literals
+import sys, io, argparse, json, collections, multiprocessing
+
+from . import bible_reference, naming_schemes, canons
+from .bible_reference import BibleReference, BiblicalBook, cached_parser
+from .streams import external_sort
+
+modes = ( "extract", "normalize", "keys", "sort", )
+
+def naming_scheme_named(name):
+    if name == "default":
+        return bible_reference.default_naming_scheme
+
+    ret = getattr(naming_schemes, name, None)
+    if not isinstance(ret, naming_schemes.LazyNamingScheme):
+        raise argparse.ArgumentTypeError("Unknown naming scheme: %s" % name)
+    return ret
+
+def naming_scheme_list(names):
+    return [ naming_scheme_named(name.strip()) for name in names.split(",") ]
+
+# The parser and output naming scheme of a worker process, set up by
+# _init_worker() from their names.
+_parser = None
+_output_scheme = None
+
+def _init_worker(config):
+    global _parser, _output_scheme
+    schemes, canon, output_scheme = config
+    _parser = cached_parser(naming_scheme_list(schemes),
+                            canons.by_name(canon), prefilter=True)
+    _output_scheme = naming_scheme_named(
+        output_scheme or schemes.split(",")[0].strip())
+
+def _spans(parser, line):
+    """
+    Yield ( start, end, BibleReference or ParseFailure, ) for the
+    references in `line`.
+    """
+    for match in parser._finditer_matches(line):
+        yield ( match.start(), match.end(),
+                BibleReference._try_from_match(match, parser.naming_schemes,
+                                               parser.canon), )
+
+def _sort_index(br):
+    """
+    Return br.int_sort_index() or None if its book is not part of the
+    canon.
+    """
+    if br.book.intid in br.book.canon.index:
+        return br.int_sort_index()
+    else:
+        return None
+
+def process_batch(mode, filename, first_lineno, lines):
+    """
+    Process a batch of lines in the current (worker) process. Return
+    a list of output lines or, for “sort”, a list of ( lineno, (intid,
+    chapter, verse, range) or None, ) tuples, and a list of warnings.
+    References whose book can’t be resolved are skipped with a
+    warning.
+    """
+    parser = _parser
+    output_scheme = _output_scheme
+    ret = []
+    warnings = []
+
+    def warn(lineno, message):
+        warnings.append("%s:%i: %s" % ( filename, lineno, message, ))
+
+    for lineno, line in enumerate(lines, first_lineno):
+        line = line.rstrip("\r\n")
+
+        if mode == "extract":
+            for start, end, br in _spans(parser, line):
+                if not br:
+                    warn(lineno, br.message)
+                    continue
+
+                ret.append(json.dumps(
+                    { "file": filename, "line": lineno,
+                      "start": start, "end": end, "text": line[start:end],
+                      "reference": br.represent_using(output_scheme),
+                      "key": _sort_index(br), }, ensure_ascii=False))
+
+        elif mode == "normalize":
+            parts = []
+            pos = 0
+            for start, end, br in _spans(parser, line):
+                if not br:
+                    warn(lineno, br.message)
+                    continue
+
+                parts.append(line[pos:start])
+                parts.append(br.represent_using(output_scheme))
+                pos = end
+            parts.append(line[pos:])
+            ret.append("".join(parts))
+
+        else:
+            br = parser.parse_or_none(line.strip())
+
+            key = None if br is None else _sort_index(br)
+            if mode == "keys":
+                ret.append(( "" if key is None else str(key) ) + "\t" + line)
+            elif br is None:
+                ret.append(( lineno, None, ))
+            elif key is None:
+                warn(lineno, "%s is not part of canon %s" % (
+                    br.book.intid, br.book.canon.name, ))
+            else:
+                ret.append(( lineno, ( br.book.intid, br.chapter, br.verse,
+                                       br.range, ), ))
+
+    return ret, warnings
+
+def batches(inputs, size):
+    """
+    Yield ( filename, first line number, lines, ) for batches of at
+    most `size` lines from the input files.
+    """
+    for filename, fp in inputs:
+        lines = []
+        lineno = 1
+        for line in fp:
+            lines.append(line)
+            if len(lines) >= size:
+                yield filename, lineno, lines
+                lineno += len(lines)
+                lines = []
+        if lines:
+            yield filename, lineno, lines
+
+def results(mode, config, inputs, jobs, batch_size):
+    """
+    Yield ( filename, output, warnings, ) from process_batch() for all
+    batches, in order.
+    With jobs > 1, batches are processed by a pool of worker processes,
+    with at most two batches per worker in flight, which keeps the
+    memory used bounded.
+    """
+    if jobs <= 1:
+        _init_worker(config)
+        for filename, lineno, lines in batches(inputs, batch_size):
+            yield ( filename, ) + process_batch(mode, filename, lineno, lines)
+    else:
+        pool = multiprocessing.Pool(jobs, _init_worker, ( config, ))
+        try:
+            pending = collections.deque()
+            for filename, lineno, lines in batches(inputs, batch_size):
+                pending.append(( filename, pool.apply_async(
+                    process_batch, ( mode, filename, lineno, lines, )), ))
+                if len(pending) >= 2 * jobs:
+                    filename, result = pending.popleft()
+                    yield ( filename, ) + result.get()
+
+            while pending:
+                filename, result = pending.popleft()
+                yield ( filename, ) + result.get()
+        finally:
+            pool.terminate()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="bibref", description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("mode", choices=modes)
+    parser.add_argument("files", nargs="*", metavar="FILE",
+                        help="Input files (UTF-8), default stdin.")
+    parser.add_argument("-n", "--naming-schemes", default="RGG_abbr",
+                        help="Comma separated naming schemes to parse "
+                        "with, e.g. RGG_abbr,Luther84 (default: RGG_abbr)")
+    parser.add_argument("-o", "--output-scheme", default=None,
+                        help="Naming scheme for output (default: the first "
+                        "of --naming-schemes)")
+    parser.add_argument("-c", "--canon", default="default",
+                        help="Canon for sort keys (default, KingJames, BHS, "
+                        "LXX…)")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="Number of worker processes.")
+    parser.add_argument("--batch-size", type=int, default=1000,
+                        help="Lines per batch handed to a worker.")
+    parser.add_argument("--run-size", type=int, default=100000,
+                        help="References sorted in memory at a time (sort).")
+    args = parser.parse_intermixed_args(argv)
+
+    # Fail early on bad names.
+    try:
+        naming_scheme_list(args.naming_schemes)
+        output_scheme = naming_scheme_named(
+            args.output_scheme or args.naming_schemes.split(",")[0].strip())
+        canon = canons.by_name(args.canon)
+    except (argparse.ArgumentTypeError, IOError) as exc:
+        parser.error(str(exc))
+    config = ( args.naming_schemes, args.canon, args.output_scheme, )
+
+    stdin = None
+    if args.files:
+        def inputs():
+            for filename in args.files:
+                with io.open(filename, encoding="utf-8") as fp:
+                    yield filename, fp
+        inputs = inputs()
+    else:
+        stdin = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8")
+        inputs = [ ( "-", stdin, ), ]
+
+    def report(warnings):
+        for warning in warnings:
+            print(warning, file=sys.stderr)
+
+    out = io.TextIOWrapper(sys.stdout.buffer, encoding="utf-8")
+    try:
+        if args.mode == "sort":
+            def references():
+                for filename, rows, warnings in results(
+                        args.mode, config, inputs, args.jobs, args.batch_size):
+                    report(warnings)
+                    for lineno, row in rows:
+                        if row is None:
+                            print("%s:%i: not a Bible reference" % (
+                                filename, lineno, ), file=sys.stderr)
+                        else:
+                            intid, chapter, verse, range = row
+                            yield BibleReference(BiblicalBook(intid, canon),
+                                                 chapter, verse, range,
+                                                 output_scheme)
+
+            for br in external_sort(references(), run_size=args.run_size):
+                out.write(br.represent_using(output_scheme) + "\n")
+        else:
+            for filename, lines, warnings in results(
+                    args.mode, config, inputs, args.jobs, args.batch_size):
+                report(warnings)
+                for line in lines:
+                    out.write(line + "\n")
+    finally:
+        # Don’t let the wrappers close sys.stdin and sys.stdout.
+        out.flush()
+        out.detach()
+        if stdin is not None:
+            stdin.detach()
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; -*-
+
+##  Copyright 2018–20 by Diedrich Vorberg <diedrich@tux4web.de>
+##
+##  All Rights Reserved
+##
+##  For more Information on orm see the README file.
+##
+##  This program is free software; you can redistribute it and/or modify
+##  it under the terms of the GNU General Public License as published by
+##  the Free Software Foundation; either version 2 of the License, or
+##  (at your option) any later version.
+##
+##  This program is distributed in the hope that it will be useful,
+##  but WITHOUT ANY WARRANTY; without even the implied warranty of
+##  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##  GNU General Public License for more details.
+##
+##  You should have received a copy of the GNU General Public License
+##  along with this program; if not, write to the Free Software
+##  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+##
+##  I have added a copy of the GPL in the file COPYING
+
+"""
+Collapse lists of Bible references into a minimal list of ranges, as
+indices and lectionaries need them:
+
+  Röm 3,1; Röm 3,2; Röm 3,3; Röm 4  →  Röm 3,1–3; 4
+
+Each reference is turned into a span from ( chapter, verse, ) to
+( chapter, verse, ) using BibleReference.span_end. The spans are
+sorted canonically and merged in one sweep where they overlap or are
+adjacent: verse 3 follows verse 2, chapter 4 follows the end of
+chapter 3. The end of chapter 3 is not known to follow 3,36, though.
+"""
+
+from __future__ import print_function, unicode_literals
+
+from .bible_reference import BibleReference, check_canon
+
+# Verse 0 is the beginning of a chapter, verse END its end. Chapter
+# END is the end of the book.
+END = 1 << 16
+
+def _span(reference):
+    if reference.chapter is None:
+        return ( 0, 0, ), ( END, END, )
+
+    start = ( reference.chapter, reference.verse or 0, )
+
+    end_chapter, end_verse = reference.span_end
+    if end_chapter is None:
+        end = ( END, END, )
+    elif end_verse is None:
+        end = ( end_chapter, END, )
+    else:
+        end = ( end_chapter, end_verse, )
+
+    if end < start:
+        end = ( start[0], start[1] or END, )
+
+    return start, end
+
+def _follows(end, start):
+    """
+    Is `start` the position right after `end`?
+    """
+    chapter, verse = end
+    if verse == END:
+        return start[0] == chapter + 1 and start[1] in ( 0, 1, )
+    else:
+        return start == ( chapter, verse + 1, )
+
+def _range(start, end):
+    """
+    Return the range string for a span, as in BibleReference.range.
+    """
+    ( c1, v1, ), ( c2, v2, ) = start, end
+
+    if c1 == 0 and c2 == END:
+        return ""
+    elif c1 == c2:
+        if v1 == 0 and v2 == END:
+            return "%i" % c1
+        elif v2 == END:
+            return "%i,%iff" % ( c1, v1, )
+        elif max(v1, 1) == v2:
+            return "%i,%i" % ( c1, v2, )
+        else:
+            return "%i,%i–%i" % ( c1, max(v1, 1), v2, )
+    else:
+        if v2 == END and v1 == 0:
+            return "%i–%i" % ( c1, c2, )
+        elif v2 == END:
+            # 3,16–5 would read as verses 16 to 5.
+            if c1 + 1 == c2:
+                return "%i,%iff; %i" % ( c1, v1, c2, )
+            else:
+                return "%i,%iff; %i–%i" % ( c1, v1, c1 + 1, c2, )
+        else:
+            return "%i,%i–%i,%i" % ( c1, max(v1, 1), c2, v2, )
+
+def compact(references, naming_scheme=None):
+    """
+    Return a list of BibleReference objects covering what the
+    `references` do, in canonical order, with overlapping and adjacent
+    ones merged. All references must belong to the same canon.
+
+    @naming_scheme: Naming scheme for the references returned;
+        defaults to that of the first reference.
+    """
+    canon = None
+    spans = []
+    for reference in references:
+        if canon is None:
+            canon = reference.book.canon
+            if naming_scheme is None:
+                naming_scheme = reference.naming_scheme
+        else:
+            check_canon(reference, canon)
+
+        start, end = _span(reference)
+        spans.append(( canon.index[reference.book.intid], start, end,
+                       reference.book, ))
+
+    spans.sort(key=lambda span: span[:2])
+
+    merged = []
+    for span in spans:
+        if merged:
+            book_index, start, end, book = merged[-1]
+            if span[0] == book_index and ( span[1] <= end
+                                           or _follows(end, span[1]) ):
+                merged[-1] = ( book_index, start, max(end, span[2]), book, )
+                continue
+        merged.append(span)
+
+    ret = []
+    for book_index, start, end, book in merged:
+        chapter, verse = start
+        if chapter == 0:
+            ret.append(BibleReference(book, None, None, "", naming_scheme))
+        else:
+            ret.append(BibleReference(book, chapter, verse or None,
+                                      _range(start, end), naming_scheme))
+
+    return ret
+
+def represent(references, naming_scheme=None, separator="; "):
+    """
+    Return a string representing a list of references using
+    `naming_scheme` (default: each reference’s own). The book name is
+    only repeated where it changes: “Röm 3,1–3; 4; Gal 2,20”.
+    """
+    parts = []
+    previous = None
+    for reference in references:
+        ns = naming_scheme or reference.naming_scheme
+        if previous is not None and reference.book == previous.book \
+           and reference.range:
+            range = reference.range
+            if ns.verse_delimiter != ",":
+                range = range.replace(",", ns.verse_delimiter)
+            parts.append(range)
+        else:
+            parts.append(reference.represent_using(ns))
+        previous = reference
+
+    return separator.join(parts)
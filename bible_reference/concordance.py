@@ -0,0 +1,402 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; -*-
+
+##  Copyright 2018–20 by Diedrich Vorberg <diedrich@tux4web.de>
+##
+##  All Rights Reserved
+##
+##  For more Information on orm see the README file.
+##
+##  This program is free software; you can redistribute it and/or modify
+##  it under the terms of the GNU General Public License as published by
+##  the Free Software Foundation; either version 2 of the License, or
+##  (at your option) any later version.
+##
+##  This program is distributed in the hope that it will be useful,
+##  but WITHOUT ANY WARRANTY; without even the implied warranty of
+##  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##  GNU General Public License for more details.
+##
+##  You should have received a copy of the GNU General Public License
+##  along with this program; if not, write to the Free Software
+##  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+##
+##  I have added a copy of the GPL in the file COPYING
+
+"""
+A concordance answers the question which documents cite a given verse
+or chapter. It is an inverted index stored in a directory:
+
+  index.json        the manifest: canon, segments and removed documents
+  seg-<n>.bcs       immutable segments, n being the segment’s generation
+
+The index is keyed by chapter, (book index + 1) << 16 | chapter << 8,
+which is int_sort_index() with the verse set to 0. Every chapter a
+reference touches gets a posting ( document id, offset, first verse,
+last verse, ) with first verse 0 meaning “from the beginning” and last
+verse 255 meaning “to the end of the chapter”. Verse lookups filter
+the chapter’s postings; posting lists are sorted by document id and
+offset.
+
+Documents added are kept in memory until commit() writes them to a
+new segment. Removing a document records its id with the current
+generation in the manifest, hiding its postings in all segments up to
+that generation. compact() merges all segments into one.
+
+Segment format (all integers little-endian)
+
+  header   16 bytes  struct "<8sII": magic b"BIBCONC1", number of keys,
+                     number of postings
+  keys     I × keys          sorted chapter keys
+  starts   I × (keys + 1)    index of each key’s first posting
+  doc_ids  I × postings
+  offsets  I × postings
+  first    B × postings
+  last     B × postings
+
+Every section is padded to a multiple of 8 bytes, like the
+ReferenceTable format (see table.py).
+"""
+
+from __future__ import print_function, unicode_literals
+import os, os.path as op, json, struct, sys, mmap, array, bisect, heapq
+
+from .bible_reference import BibleReferenceParser, BiblicalBook, \
+    sort_index, _padded
+
+magic = b"BIBCONC1"
+header = struct.Struct("<8sII")
+
+columns = ( ( "doc_ids", "I", ),
+            ( "offsets", "I", ),
+            ( "first", "B", ),
+            ( "last", "B", ), )
+
+def _pad(data):
+    return data + b"\0" * (_padded(len(data)) - len(data))
+
+def _little_endian(typecode, values):
+    ret = array.array(typecode, values)
+    if sys.byteorder != "little":
+        ret.byteswap()
+    return ret
+
+def chapter_key(book_index, chapter):
+    return sort_index(book_index, chapter, None)
+
+def postings_for(reference, canon):
+    """
+    Yield ( chapter key, first verse, last verse, ) for every chapter
+    `reference` touches.
+    """
+    b = canon.index[reference.book.intid]
+
+    if reference.chapter is None:
+        # The whole book. We post chapter 0.
+        yield chapter_key(b, 0), 0, 255
+        return
+
+    end_chapter, end_verse = reference.span_end
+    if end_chapter is None or end_chapter < reference.chapter:
+        end_chapter, end_verse = reference.chapter, reference.verse
+
+    for chapter in range(reference.chapter, min(end_chapter, 255) + 1):
+        if chapter == reference.chapter:
+            first = min(reference.verse or 0, 255)
+        else:
+            first = 0
+
+        if chapter == end_chapter and end_verse is not None:
+            last = min(end_verse, 255)
+        else:
+            last = 255
+
+        yield chapter_key(b, chapter), first, max(first, last)
+
+
+class Segment:
+    """
+    A read-only, memory-mapped segment file.
+    """
+    def __init__(self, filepath, generation):
+        self.filepath = filepath
+        self.generation = generation
+
+        with open(filepath, "rb") as fp:
+            self._mmap = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self._view = view = memoryview(self._mmap)
+        tag, keys, postings = header.unpack_from(view)
+        if tag != magic:
+            raise IOError("%s is not a concordance segment." % filepath)
+
+        def column(offset, typecode, count):
+            size = count * array.array(typecode).itemsize
+            ret = view[offset:offset+size].cast(typecode)
+            if sys.byteorder != "little":
+                ret = array.array(typecode, ret)
+                ret.byteswap()
+            return ret, offset + _padded(size)
+
+        offset = _padded(header.size)
+        self.keys, offset = column(offset, "I", keys)
+        self.starts, offset = column(offset, "I", keys + 1)
+        for name, typecode in columns:
+            data, offset = column(offset, typecode, postings)
+            setattr(self, name, data)
+
+    @classmethod
+    def write(cls, filepath, postings_by_key):
+        """
+        Write a segment file from a dict mapping chapter keys to lists
+        of ( doc_id, offset, first, last, ) tuples.
+        """
+        keys = sorted(postings_by_key.keys())
+        starts = [ 0 ]
+        rows = []
+        for key in keys:
+            rows.extend(sorted(postings_by_key[key]))
+            starts.append(len(rows))
+
+        parts = [ header.pack(magic, len(keys), len(rows)),
+                  _little_endian("I", keys).tobytes(),
+                  _little_endian("I", starts).tobytes(), ]
+        for idx, ( name, typecode, ) in enumerate(columns):
+            parts.append(_little_endian(
+                typecode, [ row[idx] for row in rows ]).tobytes())
+
+        tmp = filepath + ".tmp"
+        with open(tmp, "wb") as fp:
+            for part in parts:
+                fp.write(_pad(part))
+        os.replace(tmp, filepath)
+
+    def postings(self, key):
+        """
+        Yield the ( doc_id, offset, first, last, ) tuples for `key`.
+        """
+        idx = bisect.bisect_left(self.keys, key)
+        if idx < len(self.keys) and self.keys[idx] == key:
+            for row in range(self.starts[idx], self.starts[idx+1]):
+                yield ( self.doc_ids[row], self.offsets[row],
+                        self.first[row], self.last[row], )
+
+    def items(self):
+        """
+        Yield ( key, postings, ) for every key in the segment.
+        """
+        for key in self.keys:
+            yield key, list(self.postings(key))
+
+    def close(self):
+        for name in ( "keys", "starts", ) + tuple(
+                [ name for name, typecode in columns ]):
+            data = getattr(self, name)
+            if isinstance(data, memoryview):
+                data.release()
+        self._view.release()
+        self._mmap.close()
+
+
+class Concordance:
+    """
+    An inverted index from chapters and verses to the documents citing
+    them, stored in `directory`.
+    """
+    def __init__(self, directory, parser=None):
+        """
+        @directory: Where the index lives. Created if necessary.
+        @parser: BibleReferenceParser used to find references in the
+            documents added. Defaults to one with the default naming
+            scheme.
+        """
+        self.directory = directory
+        self.parser = parser or BibleReferenceParser()
+        self.canon = self.parser.canon
+
+        if not op.exists(directory):
+            os.makedirs(directory)
+
+        self.generation = 0
+        self.segments = []
+        self.removed = {} # doc_id -> generation
+        self._pending = {} # chapter key -> list of postings
+        self._pending_docs = set()
+
+        manifest = op.join(directory, "index.json")
+        if op.exists(manifest):
+            with open(manifest) as fp:
+                info = json.load(fp)
+
+            if info["canon"] != self.canon.name:
+                raise ValueError(
+                    "Concordance uses canon %s, parser canon %s." % (
+                        info["canon"], self.canon.name, ))
+
+            self.generation = info["generation"]
+            self.removed = dict([ ( int(doc_id), generation, )
+                                  for doc_id, generation
+                                  in info["removed"].items() ])
+            for generation in info["segments"]:
+                self.segments.append(
+                    Segment(self._segment_path(generation), generation))
+
+    def _segment_path(self, generation):
+        return op.join(self.directory, "seg-%06i.bcs" % generation)
+
+    def _write_manifest(self):
+        info = { "canon": self.canon.name,
+                 "generation": self.generation,
+                 "segments": [ segment.generation
+                               for segment in self.segments ],
+                 "removed": dict([ ( str(doc_id), generation, )
+                                   for doc_id, generation
+                                   in self.removed.items() ]), }
+
+        manifest = op.join(self.directory, "index.json")
+        with open(manifest + ".tmp", "w") as fp:
+            json.dump(info, fp)
+        os.replace(manifest + ".tmp", manifest)
+
+    def add(self, doc_id, text):
+        """
+        Index the references in `text` under `doc_id` (an integer).
+        A document that is already in the index must be removed
+        first. Call commit() to write the changes to disk. References
+        whose book can’t be resolved or isn’t part of the canon are
+        skipped.
+        """
+        if doc_id in self._pending_docs:
+            raise ValueError("Document %i has already been added." % doc_id)
+
+        postings = []
+        for start, end, reference in self.parser.finditer_spans(
+                text, skip_unresolved=True):
+            if reference.book.intid in self.canon.index:
+                for key, first, last in postings_for(reference, self.canon):
+                    postings.append(( key, start, first, last, ))
+
+        self._pending_docs.add(doc_id)
+        for key, offset, first, last in postings:
+            self._pending.setdefault(key, []).append(
+                ( doc_id, offset, first, last, ))
+
+    def remove(self, doc_id):
+        """
+        Remove a document from the index. It takes effect for lookups
+        at once and is written to disk by commit().
+        """
+        if doc_id in self._pending_docs:
+            self._pending_docs.remove(doc_id)
+            for key, postings in list(self._pending.items()):
+                postings = [ p for p in postings if p[0] != doc_id ]
+                if postings:
+                    self._pending[key] = postings
+                else:
+                    del self._pending[key]
+
+        if self.segments:
+            self.removed[doc_id] = self.generation
+
+    def commit(self):
+        """
+        Write the documents added since the last commit to a new
+        segment and update the manifest.
+        """
+        if self._pending:
+            self.generation += 1
+            path = self._segment_path(self.generation)
+            Segment.write(path, self._pending)
+            self.segments.append(Segment(path, self.generation))
+            self._pending = {}
+            self._pending_docs = set()
+
+        self._write_manifest()
+
+    def compact(self):
+        """
+        Merge all segments into one, dropping removed documents.
+        Pending changes are committed first.
+        """
+        self.commit()
+        if len(self.segments) < 2 and not self.removed:
+            return
+
+        merged = {}
+        for segment in self.segments:
+            for key, postings in segment.items():
+                merged.setdefault(key, []).extend(
+                    [ p for p in postings
+                      if self._alive(p[0], segment.generation) ])
+
+        old = self.segments
+        self.generation += 1
+        path = self._segment_path(self.generation)
+        Segment.write(path, dict([ ( key, postings, )
+                                   for key, postings in merged.items()
+                                   if postings ]))
+        self.segments = [ Segment(path, self.generation) ]
+        self.removed = {}
+        self._write_manifest()
+
+        for segment in old:
+            segment.close()
+            os.unlink(segment.filepath)
+
+    def close(self):
+        for segment in self.segments:
+            segment.close()
+        self.segments = []
+
+    def _alive(self, doc_id, generation):
+        removed = self.removed.get(doc_id)
+        return removed is None or generation > removed
+
+    def _postings(self, key):
+        """
+        Return an iterator over the postings for `key` in all segments
+        and the pending documents, sorted by document id and offset.
+        """
+        def live(segment):
+            for posting in segment.postings(key):
+                if self._alive(posting[0], segment.generation):
+                    yield posting
+
+        sources = [ live(segment) for segment in self.segments ]
+        sources.append(iter(sorted(self._pending.get(key, []))))
+        return heapq.merge(*sources)
+
+    def _book_index(self, book):
+        if isinstance(book, BiblicalBook):
+            book = book.intid
+        return self.canon.index[book]
+
+    def chapter(self, book, chapter):
+        """
+        Return a list of ( doc_id, offset, ) pairs of the references
+        to any part of `chapter` of `book` (a BiblicalBook or intid).
+        """
+        key = chapter_key(self._book_index(book), chapter)
+        return [ ( doc_id, offset, )
+                 for doc_id, offset, first, last in self._postings(key) ]
+
+    def verse(self, book, chapter, verse):
+        """
+        Return a list of ( doc_id, offset, ) pairs of the references
+        that include `verse`. References to the whole chapter do.
+        """
+        key = chapter_key(self._book_index(book), chapter)
+        return [ ( doc_id, offset, )
+                 for doc_id, offset, first, last in self._postings(key)
+                 if first <= verse <= last ]
+
+    def documents(self, book, chapter, verse=None):
+        """
+        Return the sorted list of document ids citing a chapter or verse.
+        """
+        if verse is None:
+            postings = self.chapter(book, chapter)
+        else:
+            postings = self.verse(book, chapter, verse)
+
+        return sorted(set([ doc_id for doc_id, offset in postings ]))
@@ -0,0 +1,193 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; -*-
+
+##  Copyright 2018–20 by Diedrich Vorberg <diedrich@tux4web.de>
+##
+##  All Rights Reserved
+##
+##  For more Information on orm see the README file.
+##
+##  This program is free software; you can redistribute it and/or modify
+##  it under the terms of the GNU General Public License as published by
+##  the Free Software Foundation; either version 2 of the License, or
+##  (at your option) any later version.
+##
+##  This program is distributed in the hope that it will be useful,
+##  but WITHOUT ANY WARRANTY; without even the implied warranty of
+##  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##  GNU General Public License for more details.
+##
+##  You should have received a copy of the GNU General Public License
+##  along with this program; if not, write to the Free Software
+##  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+##
+##  I have added a copy of the GPL in the file COPYING
+
+"""
+A Context compiles a set of naming schemes and canons into one
+structure for a process that uses all of them.
+
+Each NamingScheme builds its own index of names on demand, each canon
+its own dict of book positions, all keyed by their own copies of the
+intids. The Context numbers all books once (intids are interned) and
+keeps
+
+  - one dict from ordinal + capitalized name (“1Kor”) to book number
+    for all naming schemes, the first naming scheme winning,
+  - the book positions of all canons in one flat array,
+  - every naming scheme’s names, formatted for output, in tuples
+    indexed by book number (None for books it can’t name).
+
+A Context is a sequence of its naming schemes, so it may be passed
+where a list of naming schemes is expected. Parsers created by
+parser() look names up in the Context, abbreviations are still
+resolved by the naming schemes’ tries.
+"""
+
+from __future__ import print_function, unicode_literals
+import sys, array, collections.abc
+
+from .bible_reference import BibleReferenceParser, BiblicalBook, \
+    lazy_init_lock, _resolve_abbreviation, sort_index, ordinal_re
+
+class Context(collections.abc.Sequence):
+    def __init__(self, naming_schemes, canons):
+        """
+        @param naming_schemes: The naming schemes in order of priority.
+            The first one is used for representation by default.
+        @param canons: The canons. The first one is the default for
+            parser().
+        """
+        self.naming_schemes = tuple(naming_schemes)
+        self.canons = tuple(canons)
+
+        books = []
+        number = {}
+        def add(intid):
+            if intid not in number:
+                number[intid] = len(books)
+                books.append(sys.intern(intid))
+
+        for canon in self.canons:
+            for intid in canon.book_ids:
+                add(intid)
+        for ns in self.naming_schemes:
+            for intid in sorted(ns.name_by_intid):
+                add(intid)
+
+        self.books = tuple(books)
+        self.book_number = number
+
+        # positions[canon number * number of books + book number] is
+        # the book’s index in the canon, -1 if it is not part of it.
+        n = len(books)
+        self.canon_number = dict([ ( canon.name, i, )
+                                   for i, canon in enumerate(self.canons) ])
+        self.positions = array.array("h", [ -1 ]) * (len(self.canons) * n)
+        for i, canon in enumerate(self.canons):
+            for position, intid in enumerate(canon.book_ids):
+                self.positions[i * n + number[intid]] = position
+
+        self.scheme_number = dict([ ( id(ns), i, ) for i, ns
+                                    in enumerate(self.naming_schemes) ])
+        self.names = []
+        self._lookup = {}
+        for ns in self.naming_schemes:
+            names = [ None ] * n
+            # The keys of the naming scheme’s intid_by_name, which we
+            # don’t want to build and keep, too: later books win
+            # between books of the same name, as they do there.
+            lookup = {}
+            for intid, name in ns.name_by_intid.items():
+                book = number[intid]
+                ordinal, word = ordinal_re.match(name).groups()
+                lookup[(ordinal or "") + word.capitalize()] = book
+                try:
+                    names[book] = sys.intern(ns.name_for(BiblicalBook(intid)))
+                except TypeError:
+                    # A book with an ordinal whose name doesn’t have one.
+                    # Leave it to represent_using().
+                    pass
+            self.names.append(tuple(names))
+
+            # The first naming scheme wins, as in _resolve_book().
+            for key, book in lookup.items():
+                self._lookup.setdefault(sys.intern(key), book)
+        self.names = tuple(self.names)
+
+        self._parsers = {}
+
+    def __getitem__(self, idx):
+        return self.naming_schemes[idx]
+
+    def __len__(self):
+        return len(self.naming_schemes)
+
+    def resolve_book(self, ordinal, name):
+        """
+        Return ( intid, ambiguous, ) for a book name as matched by
+        the reference grammar, see bible_reference._resolve_book().
+        """
+        book = self._lookup.get((ordinal or "") + name.capitalize())
+        if book is not None:
+            return self.books[book], ()
+        else:
+            return _resolve_abbreviation(ordinal or None, name,
+                                         self.naming_schemes)
+
+    def sort_key(self, book, chapter, verse, canon=0):
+        """
+        Return the int_sort_index() of a reference given as numbers:
+        book and canon numbers (see book_number and canon_number),
+        chapter and verse (or None). Raise KeyError if the book is
+        not part of the canon.
+        """
+        position = self.positions[canon * len(self.books) + book]
+        if position < 0:
+            raise KeyError(self.books[book])
+
+        return sort_index(position, chapter, verse)
+
+    def represent(self, reference, naming_scheme=None):
+        """
+        Return reference.represent_using(naming_scheme) using the
+        precomputed names. `naming_scheme` defaults to the reference’s
+        own.
+        """
+        naming_scheme = naming_scheme or reference.naming_scheme
+        i = self.scheme_number.get(id(naming_scheme))
+        if i is None:
+            return reference.represent_using(naming_scheme)
+
+        name = self.names[i][self.book_number[reference.book.intid]]
+        if name is None:
+            return reference.represent_using(naming_scheme)
+
+        range = reference.range
+        if range:
+            if naming_scheme.verse_delimiter != ",":
+                range = range.replace(",", naming_scheme.verse_delimiter)
+            return "%s %s" % ( name, range, )
+        else:
+            return name
+
+    def parser(self, canon=None, prefilter=False, backend=None):
+        """
+        Return a BibleReferenceParser that looks book names up in
+        this Context, creating it on first use only. cached_parser()
+        returns these for a Context.
+
+        @param canon: Defaults to our first canon.
+        """
+        if canon is None:
+            canon = self.canons[0]
+        key = ( id(canon), bool(prefilter), backend, )
+
+        ret = self._parsers.get(key)
+        if ret is None:
+            with lazy_init_lock:
+                ret = self._parsers.get(key)
+                if ret is None:
+                    ret = BibleReferenceParser(self, canon, prefilter, backend)
+                    self._parsers[key] = ret
+        return ret
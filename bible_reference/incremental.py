@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; -*-
+
+##  Copyright 2018–20 by Diedrich Vorberg <diedrich@tux4web.de>
+##
+##  All Rights Reserved
+##
+##  For more Information on orm see the README file.
+##
+##  This program is free software; you can redistribute it and/or modify
+##  it under the terms of the GNU General Public License as published by
+##  the Free Software Foundation; either version 2 of the License, or
+##  (at your option) any later version.
+##
+##  This program is distributed in the hope that it will be useful,
+##  but WITHOUT ANY WARRANTY; without even the implied warranty of
+##  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##  GNU General Public License for more details.
+##
+##  You should have received a copy of the GNU General Public License
+##  along with this program; if not, write to the Free Software
+##  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+##
+##  I have added a copy of the GPL in the file COPYING
+
+"""
+Keep the Bible references in a document up to date while it is being
+edited, without re-scanning all of it.
+
+finditer() resumes searching where the last match ended. So scanning
+may start at any position that is not inside a match and, after the
+edited region, stop as soon as it finds a match the previous scan
+found, too: From there on, everything is as before. On the left, the
+scan starts `lookback` characters before the edit (or at the start of
+the match that spans that position), since a reference may start a
+little before the text that completes it.
+
+The scanner keeps every match of the grammar for this, also those
+whose book name can’t be resolved (“3 Kor”). These are left out of
+`matches`.
+"""
+
+from __future__ import print_function, unicode_literals
+import bisect
+
+from .bible_reference import BibleReference
+
+class IncrementalScanner:
+    """
+    Hold a document’s text and the references in it as a sorted list
+    of ( start, end, BibleReference, ) tuples in `matches`. References
+    whose book name can’t be resolved are skipped.
+    """
+    def __init__(self, parser, text="", lookback=256):
+        """
+        @parser: The BibleReferenceParser to use.
+        @text: The initial text of the document.
+        @lookback: How many characters before an edit to re-scan. A
+            reference whose book name is further away from the edit
+            than this will not notice the edit.
+        """
+        self.parser = parser
+        self.lookback = lookback
+        self.text = text
+        self._update([ self._resolve(match)
+                       for match in parser.regex.finditer(text) ])
+
+    def _resolve(self, match):
+        # The reference is a ParseFailure if the book is unknown.
+        return ( match.start(), match.end(),
+                 BibleReference._try_from_match(
+                     match, self.parser.naming_schemes, self.parser.canon), )
+
+    def _update(self, spans):
+        # All matches of the grammar, for resyncing, and the resolved
+        # ones.
+        self._spans = spans
+        self._starts = [ span[0] for span in spans ]
+        self.matches = [ span for span in spans if span[2] ]
+
+    def edit(self, offset, deleted, inserted):
+        """
+        Replace `deleted` characters at `offset` with the string
+        `inserted`. Return two lists ( added, removed, ) of ( start,
+        end, BibleReference, ) tuples. The offsets of the removed
+        references are those in the text before the edit.
+        """
+        old_text = self.text
+        if offset < 0 or deleted < 0 or offset + deleted > len(old_text):
+            raise IndexError("Edit outside of the document.")
+
+        text = old_text[:offset] + inserted + old_text[offset+deleted:]
+        delta = len(inserted) - deleted
+        edit_end = offset + deleted # in the old text
+        new_edit_end = offset + len(inserted) # in the new text
+
+        # Where to start scanning: lookback characters before the
+        # edit, unless that is inside an old match.
+        start = max(0, offset - self.lookback)
+        first = bisect.bisect_left(self._starts, start)
+        if first > 0 and self._spans[first-1][1] > start:
+            first -= 1
+            start = self._spans[first][0]
+
+        regex = self.parser.regex
+        old = self._spans
+        found = []
+        sync = len(old)
+        pos = start
+        idx = first
+        while True:
+            match = regex.search(text, pos)
+            if match is None:
+                break
+
+            # Old matches behind the edit, shifted to the new text.
+            # If the scan finds one of them, it is in sync again.
+            while idx < len(old) and ( old[idx][0] < edit_end or
+                                       old[idx][0] + delta < match.start() ):
+                idx += 1
+
+            if idx < len(old) and match.start() >= new_edit_end \
+               and old[idx][0] + delta == match.start() \
+               and old[idx][1] + delta == match.end():
+                sync = idx
+                break
+
+            found.append(self._resolve(match))
+            pos = match.end()
+
+        shifted = [ ( s + delta, e + delta, reference, )
+                    for s, e, reference in old[sync:] ]
+        self.text = text
+        self._update(old[:first] + found + shifted)
+
+        # Report the difference between the old and new matches in
+        # the re-scanned region, comparing positions and text.
+        def old_key(match):
+            s, e, reference = match
+            if e <= offset:
+                return ( s, e, old_text[s:e], )
+            elif s >= edit_end:
+                return ( s + delta, e + delta, old_text[s:e], )
+            else:
+                return None # The edit changed it.
+
+        new_keys = set([ ( s, e, text[s:e], ) for s, e, reference in found ])
+        old_keys = set([ old_key(match) for match in old[first:sync] ])
+
+        added = [ match for match in found
+                  if match[2] and ( match[0], match[1],
+                                    text[match[0]:match[1]], )
+                  not in old_keys ]
+        removed = [ match for match in old[first:sync]
+                    if match[2] and old_key(match) not in new_keys ]
+
+        return added, removed
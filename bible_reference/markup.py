@@ -0,0 +1,398 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; -*-
+
+##  Copyright 2018–20 by Diedrich Vorberg <diedrich@tux4web.de>
+##
+##  All Rights Reserved
+##
+##  For more Information on orm see the README file.
+##
+##  This program is free software; you can redistribute it and/or modify
+##  it under the terms of the GNU General Public License as published by
+##  the Free Software Foundation; either version 2 of the License, or
+##  (at your option) any later version.
+##
+##  This program is distributed in the hope that it will be useful,
+##  but WITHOUT ANY WARRANTY; without even the implied warranty of
+##  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##  GNU General Public License for more details.
+##
+##  You should have received a copy of the GNU General Public License
+##  along with this program; if not, write to the Free Software
+##  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+##
+##  I have added a copy of the GPL in the file COPYING
+
+"""
+Find Bible references in HTML and XML documents, streaming.
+
+Scanning the raw markup misses references split by tags (“Röm
+<i>3,16</i>”) and finds some inside attributes. Stripping the tags
+first loses the positions in the document. The MarkupScanner keeps
+both: it reads the document in chunks, builds the text a reader
+would see and scans that, mapping each match back to the document.
+
+  - Tags, comments, processing instructions and the contents of
+    <script> and <style> are zero-width. Block level tags (see
+    block_tags) become a "\\x00" in the text, so no reference spans
+    paragraphs.
+  - Entities and character references are decoded. The content of
+    CDATA sections is text, verbatim.
+  - A match covers a source range and, if tags are inside it, several
+    segments of text, which is what linkify() wraps in links.
+
+As in the IncrementalScanner, the last `margin` characters of text
+seen are not reported on until more of the document (or its end)
+arrives, since a reference may continue in the next chunk.
+"""
+
+from __future__ import print_function, unicode_literals
+import re, html
+
+from .bible_reference import BibleReference
+
+# HTML and TEI block level elements.
+block_tags = frozenset([
+    "address", "article", "aside", "blockquote", "body", "br", "caption",
+    "dd", "div", "dl", "dt", "fieldset", "figcaption", "figure", "footer",
+    "form", "h1", "h2", "h3", "h4", "h5", "h6", "head", "header", "hr",
+    "html", "li", "main", "nav", "ol", "p", "pre", "section", "table",
+    "tbody", "td", "tfoot", "th", "thead", "title", "tr", "ul",
+    # TEI
+    "ab", "cell", "item", "l", "lb", "lg", "list", "note", "pb", "row",
+    "sp", "speaker", "text", ])
+
+# Elements whose content is not text.
+skip_tags = frozenset([ "script", "style", ])
+
+# Elements whose content linkify() leaves alone: links can’t be nested
+# and title and textarea contain text only.
+nolink_tags = frozenset([ "a", "title", "textarea", ])
+
+_markup_re = re.compile(r"""
+    <[!?][^>]*>
+  | <(?P<closing>/)?(?P<tag>[A-Za-z_][\w:.-]*)
+      (?:[^>"']|"[^"]*"|'[^']*')*>
+  | &(?:\#[0-9]+|\#[xX][0-9a-fA-F]+|[A-Za-z][A-Za-z0-9]*);
+""", re.VERBOSE | re.DOTALL)
+
+# Markup cut off by the end of the data: _markup_re may still match
+# once more data arrives.
+_partial_markup_re = re.compile(r"""
+  <(?: [!?][^>]*
+     | /?(?:[A-Za-z_][\w:.-]*
+            (?:[^>"']|"[^"]*"|'[^']*')*(?:"[^"]*|'[^']*)?)? )?
+""", re.VERBOSE | re.DOTALL)
+
+# The ends of comments and CDATA sections and how many characters of
+# them may be at the end of the data received so far.
+_comment_end = ( re.compile(r"-->"), 2, )
+_cdata_end = ( re.compile(r"\]\]>"), 2, )
+
+# An entity may be this long (plus “&” and “;”).
+_max_entity = 32
+
+def _local_name(tag):
+    return tag.rsplit(":", 1)[-1].lower()
+
+class MarkupMatch:
+    """
+    A Bible reference found by the MarkupScanner: `start` and `end` in
+    the document, the `segments` of text it consists of as a list of
+    ( start, end, ) pairs, the `text` it has when read and the
+    `reference`. `linkable` is False if (part of) it is inside one of
+    the scanner’s nolink_tags or a CDATA section.
+    """
+    __slots__ = ( "start", "end", "segments", "text", "reference",
+                  "linkable", )
+
+    def __init__(self, segments, text, reference, linkable=True):
+        self.start = segments[0][0]
+        self.end = segments[-1][1]
+        self.segments = segments
+        self.text = text
+        self.reference = reference
+        self.linkable = linkable
+
+    def __repr__(self):
+        return "<MarkupMatch %i:%i %s>" % ( self.start, self.end,
+                                            repr(self.text), )
+
+class MarkupScanner:
+    """
+    Feed a document to feed() in chunks of any size and call close() at
+    the end. Both return the MarkupMatch objects complete so far, in
+    document order. Offsets are those in the str the chunks make up.
+    """
+    def __init__(self, parser, margin=256, block_tags=block_tags,
+                 skip_tags=skip_tags, nolink_tags=nolink_tags):
+        """
+        @param parser: The BibleReferenceParser to use. References
+            whose book names it can’t resolve are skipped.
+        @param margin: Number of characters at the end of the text
+            seen so far that a reference in progress may span.
+        @param block_tags: (Local, lower case) names of the elements
+            that separate text.
+        @param skip_tags: Names of elements whose content is ignored.
+        @param nolink_tags: Names of elements whose content must not
+            be linked, see MarkupMatch.linkable.
+        """
+        self.parser = parser
+        self.margin = margin
+        self.block_tags = block_tags
+        self.skip_tags = skip_tags
+        self.nolink_tags = nolink_tags
+
+        # Markup not yet tokenized and its offset in the document.
+        self._raw = ""
+        self._raw_offset = 0
+
+        # Inside a comment, CDATA section, <script> or <style>: the
+        # regex for its end, how many characters of it may have been
+        # received already (None: from the last “<” on) and whether
+        # the content is text.
+        self._skipping = None
+
+        # Length of the start of _raw that is known to be incomplete
+        # markup.
+        self._incomplete = 0
+
+        # How many nolink_tags are open.
+        self._nolink_depth = 0
+
+        # The text not yet scanned to the end, and for each of its
+        # characters the range in the document it comes from and
+        # whether it may be linked.
+        self._text = []
+        self._starts = []
+        self._ends = []
+        self._linkable = []
+
+    @property
+    def safe_offset(self):
+        """
+        The offset in the document before which no matches will be
+        reported anymore.
+        """
+        if self._starts:
+            return self._starts[0]
+        else:
+            return self._raw_offset
+
+    def feed(self, data):
+        self._raw += data
+        self._tokenize(False)
+        return self._scan(False)
+
+    def close(self):
+        self._tokenize(True)
+        return self._scan(True)
+
+    def _add_text(self, text, offset, linkable=True):
+        self._text.append(text)
+        self._starts.extend(range(offset, offset + len(text)))
+        self._ends.extend(range(offset + 1, offset + len(text) + 1))
+        self._linkable.extend(
+            [ linkable and self._nolink_depth == 0 ] * len(text))
+
+    def _add_char(self, ch, start, end):
+        self._text.append(ch)
+        self._starts.append(start)
+        self._ends.append(end)
+        self._linkable.append(self._nolink_depth == 0)
+
+    def _tokenize(self, final):
+        raw = self._raw
+        offset = self._raw_offset
+        pos = 0
+        length = len(raw)
+        incomplete, self._incomplete = self._incomplete, 0
+
+        while pos < length:
+            if self._skipping is not None:
+                end_re, keep, is_text = self._skipping
+                match = end_re.search(raw, pos)
+                if match is not None:
+                    end, resume = match.start(), match.end()
+                elif final:
+                    end = resume = length
+                else:
+                    # Hold back what may be the beginning of the end
+                    # only, the rest need not be searched again.
+                    if keep is None:
+                        end = raw.rfind("<", pos)
+                        if end < 0:
+                            end = length
+                    else:
+                        end = max(pos, length - keep)
+                    resume = end
+
+                if is_text and end > pos:
+                    # A link inside a CDATA section would be text.
+                    self._add_text(raw[pos:end], offset + pos, False)
+                pos = resume
+                if match is None:
+                    break
+                self._skipping = None
+                continue
+
+            # Text up to the next markup.
+            lt = raw.find("<", pos)
+            amp = raw.find("&", pos)
+            nxt = min([ i for i in ( lt, amp, ) if i >= 0 ] or [ length ])
+            if nxt > pos:
+                self._add_text(raw[pos:nxt], offset + pos)
+                pos = nxt
+                continue
+
+            if raw.startswith("<!--", pos):
+                self._skipping = _comment_end + ( False, )
+                pos += 4
+                continue
+            elif raw.startswith("<![CDATA[", pos):
+                self._skipping = _cdata_end + ( True, )
+                pos += 9
+                continue
+            elif pos == 0 and incomplete and not final \
+                 and raw[0] == "<" and raw.find(">", incomplete) < 0:
+                # Nothing that could complete the markup has arrived.
+                self._incomplete = length
+                break
+
+            match = _markup_re.match(raw, pos)
+            if match is None:
+                # Incomplete markup at the end of the data or a “<” or
+                # “&” that is just that.
+                rest = raw[pos:]
+                if not final and (
+                        _partial_markup_re.fullmatch(raw, pos)
+                        or ( rest[0] == "&" and ";" not in rest
+                             and len(rest) < _max_entity + 2 )):
+                    self._incomplete = len(rest)
+                    break
+                self._add_text(raw[pos], offset + pos)
+                pos += 1
+                continue
+
+            token = match.group()
+            if token[0] == "&":
+                decoded = html.unescape(token)
+                if decoded == token:
+                    self._add_text(token, offset + pos)
+                else:
+                    self._add_char(decoded, offset + pos, offset + match.end())
+            elif match.group("tag") is not None:
+                name = _local_name(match.group("tag"))
+                if name in self.block_tags:
+                    self._add_char("\x00", offset + pos, offset + match.end())
+                if name in self.nolink_tags and not token.endswith("/>"):
+                    if match.group("closing"):
+                        self._nolink_depth = max(0, self._nolink_depth - 1)
+                    else:
+                        self._nolink_depth += 1
+                if name in self.skip_tags and not match.group("closing") \
+                   and not token.endswith("/>"):
+                    self._skipping = ( re.compile(
+                        r"</%s\s*>" % re.escape(match.group("tag")),
+                        re.IGNORECASE), None, False, )
+            pos = match.end()
+
+        self._raw = raw[pos:]
+        self._raw_offset = offset + pos
+
+    def _segments(self, start, end):
+        starts, ends = self._starts, self._ends
+        ret = []
+        segment_start = starts[start]
+        for i in range(start + 1, end):
+            if starts[i] != ends[i-1]:
+                ret.append(( segment_start, ends[i-1], ))
+                segment_start = starts[i]
+        ret.append(( segment_start, ends[end-1], ))
+        return ret
+
+    def _scan(self, final):
+        text = "".join(self._text)
+        regex = self.parser.regex
+        limit = len(text) if final else len(text) - self.margin
+
+        ret = []
+        pos = 0
+        held = None
+        while True:
+            match = regex.search(text, pos)
+            if match is None:
+                break
+            if match.end() > limit:
+                held = match.start()
+                break
+
+            reference = BibleReference._try_from_match(
+                match, self.parser.naming_schemes, self.parser.canon)
+            if reference:
+                ret.append(MarkupMatch(
+                    self._segments(match.start(), match.end()),
+                    match.group(), reference,
+                    all(self._linkable[match.start():match.end()])))
+            pos = match.end()
+
+        # Forget the text that has been dealt with.
+        cut = max(pos, limit)
+        if held is not None:
+            cut = min(cut, held)
+        self._text = [ text[cut:] ]
+        del self._starts[:cut]
+        del self._ends[:cut]
+        del self._linkable[:cut]
+
+        return ret
+
+def linkify(parser, chunks, write, href, **kw):
+    """
+    Copy an HTML or XML document, wrapping each text segment of every
+    Bible reference in it in an <a> element, in one pass. References
+    that are not MarkupMatch.linkable are left alone.
+
+    @param chunks: Iterable of str, like a file opened in text mode.
+    @param write: Called with the output str, piece by piece.
+    @param href: Called with each BibleReference, returns the URL to
+        link to or None to leave it alone.
+    Other keyword arguments are passed to MarkupScanner. Return the
+    number of references linked.
+    """
+    scanner = MarkupScanner(parser, **kw)
+    pending = [ "" ]
+    state = { "offset": 0, "count": 0, }
+
+    def emit(matches, until):
+        source = "".join(pending)
+        base = state["offset"]
+        pos = 0
+        for match in matches:
+            if not match.linkable:
+                continue
+            url = href(match.reference)
+            if url is None:
+                continue
+
+            opening = '<a href="%s">' % html.escape(url, quote=True)
+            for start, end in match.segments:
+                write(source[pos:start-base])
+                write(opening)
+                write(source[start-base:end-base])
+                write("</a>")
+                pos = end - base
+            state["count"] += 1
+
+        write(source[pos:until-base])
+        pending[:] = [ source[until-base:] ]
+        state["offset"] = until
+
+    for chunk in chunks:
+        pending.append(chunk)
+        emit(scanner.feed(chunk), scanner.safe_offset)
+
+    matches = scanner.close()
+    emit(matches, state["offset"] + len("".join(pending)))
+
+    return state["count"]
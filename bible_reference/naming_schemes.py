@@ -27,21 +27,29 @@
 Convenience module.
 """
 
-from .bible_reference import NamingScheme
+from .bible_reference import NamingScheme, lazy_init_lock
 
 class LazyNamingScheme:
     """
     THe naming-schemes are there, but they are only loaded from their
-    info file, if needed.
+    info file, if needed. Loading is thread-safe and happens once.
     """
     def __init__(self, name, ordinal_delimiter=".", verse_delimiter=","):
         self._lazy = ( name, ordinal_delimiter, verse_delimiter, )
         self.naming_scheme = None
     
     def __getattr__(self, name):
+        if name.startswith("__"):
+            # Don’t load the naming scheme for protocol lookups
+            # (pickle, copy…).
+            raise AttributeError(name)
+
         if self.naming_scheme is None:
-            n, ordinal, verse = self._lazy
-            self.naming_scheme = NamingScheme.internal(n, ordinal, verse)
+            with lazy_init_lock:
+                if self.naming_scheme is None:
+                    n, ordinal, verse = self._lazy
+                    self.naming_scheme = NamingScheme.internal(
+                        n, ordinal, verse)
             
         return getattr(self.naming_scheme, name)
     
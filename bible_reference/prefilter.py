@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; -*-
+
+##  Copyright 2018–20 by Diedrich Vorberg <diedrich@tux4web.de>
+##
+##  All Rights Reserved
+##
+##  For more Information on orm see the README file.
+##
+##  This program is free software; you can redistribute it and/or modify
+##  it under the terms of the GNU General Public License as published by
+##  the Free Software Foundation; either version 2 of the License, or
+##  (at your option) any later version.
+##
+##  This program is distributed in the hope that it will be useful,
+##  but WITHOUT ANY WARRANTY; without even the implied warranty of
+##  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##  GNU General Public License for more details.
+##
+##  You should have received a copy of the GNU General Public License
+##  along with this program; if not, write to the Free Software
+##  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+##
+##  I have added a copy of the GPL in the file COPYING
+
+"""
+Most text does not contain any Bible references at all, yet the
+reference regular expression is tried at every character position.
+The BookNamePrefilter finds all occurances of book names in one
+linear pass using an Aho–Corasick automaton. The full regular
+expression only needs to be tried where a reference may start.
+"""
+
+from __future__ import print_function, unicode_literals
+import re
+
+class AhoCorasick:
+    """
+    A deterministic Aho–Corasick automaton for a set of literal
+    strings. Transitions are stored as one dict per state, completed
+    with the failure transitions at construction time, so scanning
+    needs exactly one dict lookup per character.
+    """
+    def __init__(self, needles):
+        goto = [ {}, ]
+        # For each state the lengths of the needles ending in it.
+        lengths = [ set(), ]
+
+        for needle in needles:
+            if not needle:
+                raise ValueError("Empty needles are not supported.")
+
+            state = 0
+            for ch in needle:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    lengths.append(set())
+                state = nxt
+            lengths[state].add(len(needle))
+
+        # Breadth-first construction of the failure function. Each
+        # state’s dict is completed with the transitions of its
+        # failure states except the root, so a missing transition
+        # always continues at the root state.
+        root = goto[0]
+        fail = [ 0 ] * len(goto)
+        queue = list(root.values())
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            f = fail[state]
+
+            for ch, nxt in list(goto[state].items()):
+                queue.append(nxt)
+                fail[nxt] = (f and goto[f].get(ch)) or root.get(ch, 0)
+                lengths[nxt] |= lengths[fail[nxt]]
+
+            if f:
+                for ch, nxt in goto[f].items():
+                    goto[state].setdefault(ch, nxt)
+
+        self.delta = goto
+        self.lengths = tuple([tuple(sorted(l)) for l in lengths])
+
+    def iter_starts(self, s):
+        """
+        Yield (position, needle length) for every occurance of every
+        needle in s, ordered by the position the needle *ends* at.
+        """
+        delta = self.delta
+        lengths = self.lengths
+        root = delta[0]
+        state = 0
+
+        for idx, ch in enumerate(s):
+            if state:
+                state = delta[state].get(ch)
+                if state is None:
+                    state = root.get(ch, 0)
+            else:
+                state = root.get(ch, 0)
+
+            if state and lengths[state]:
+                for length in lengths[state]:
+                    yield idx - length + 1, length
+
+
+# Characters that would not match literally in a regular expression
+# compiled with re.VERBOSE (whitespace is ignored there).
+_regex_special_re = re.compile(r"[\.\^\$\*\+\?\{\}\[\]\\\|\(\)#]")
+_whitespace_re = re.compile(r"\s+", re.UNICODE)
+
+def regex_literal(name):
+    """
+    Return the literal string a book name matches when it is pasted
+    into the (verbose) reference regular expression. Return None if
+    the name contains regex syntax, in which case no literal exists.
+    """
+    if _regex_special_re.search(name):
+        return None
+    else:
+        return _whitespace_re.sub("", name)
+
+
+class BookNamePrefilter:
+    """
+    Find the positions in a string where a Bible reference using one
+    of a set of book names may start.
+    """
+    def __init__(self, book_names):
+        """
+        @book_names: The book names (without ordinals) as they are
+            pasted into the reference regular expression.
+        """
+        needles = set()
+        for name in book_names:
+            literal = regex_literal(name)
+            if literal is None:
+                raise ValueError("Book name %s is not a literal." % repr(name))
+            needles.add(literal)
+
+        self.automaton = AhoCorasick(sorted(needles))
+
+    def candidates(self, s):
+        """
+        Return a sorted list of the positions at which a reference
+        may start in s. This is a superset of the match positions: A
+        reference starts with a book name or with an ordinal digit,
+        optionally followed by a period and whitespace, and then the
+        book name.
+        """
+        ret = set()
+        for start, length in self.automaton.iter_starts(s):
+            ret.add(start)
+
+            # Walk back across the optional ordinal: (\d)[\.\s]?\s*
+            idx = start
+            while idx > 0 and s[idx-1].isspace():
+                idx -= 1
+
+            if idx > 0 and s[idx-1].isdecimal():
+                ret.add(idx-1)
+            elif idx > 1 and s[idx-1] == "." and s[idx-2].isdecimal():
+                ret.add(idx-2)
+
+        return sorted(ret)
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; -*-
+
+##  Copyright 2018–20 by Diedrich Vorberg <diedrich@tux4web.de>
+##
+##  All Rights Reserved
+##
+##  For more Information on orm see the README file.
+##
+##  This program is free software; you can redistribute it and/or modify
+##  it under the terms of the GNU General Public License as published by
+##  the Free Software Foundation; either version 2 of the License, or
+##  (at your option) any later version.
+##
+##  This program is distributed in the hope that it will be useful,
+##  but WITHOUT ANY WARRANTY; without even the implied warranty of
+##  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##  GNU General Public License for more details.
+##
+##  You should have received a copy of the GNU General Public License
+##  along with this program; if not, write to the Free Software
+##  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+##
+##  I have added a copy of the GPL in the file COPYING
+
+"""
+Pre-forking servers (gunicorn and the like) should build everything
+this package loads lazily in the parent process. Otherwise every
+worker loads the naming schemes, builds the indices and compiles the
+parsers on first use, duplicating that memory in each of them.
+
+Call prewarm() in the parent before the workers are forked.
+"""
+
+from __future__ import print_function, unicode_literals
+import gc
+
+from . import bible_reference, canons, naming_schemes
+
+def all_naming_schemes():
+    """
+    Return the bundled naming schemes (those in naming_schemes.py)
+    and the default naming scheme.
+    """
+    ret = [ bible_reference.default_naming_scheme, ]
+    for name in sorted(dir(naming_schemes)):
+        obj = getattr(naming_schemes, name)
+        if isinstance(obj, naming_schemes.LazyNamingScheme) and not obj in ret:
+            ret.append(obj)
+
+    return ret
+
+def prewarm(parsers=(), freeze=True):
+    """
+    Load all bundled canons and naming schemes, build their indices
+    and create the parsers requested through cached_parser(), so they
+    are in memory before the process forks. The parsers are pinned:
+    cached_parser() returns them in every worker, however many other
+    parsers it creates.
+
+    @parsers: Iterable of parser configurations. Each is either a list
+        of naming schemes or a dict of keyword arguments for
+        bible_reference.cached_parser().
+    @freeze: Run gc.freeze() after a full collection. The objects
+        created so far are moved to a permanent generation the garbage
+        collector won’t visit. In the workers, it would otherwise
+        write to their headers, copying the memory pages they are on.
+
+    Returns the list of parsers.
+    """
+    # Importing the canons module has loaded all bundled canons.
+    assert bible_reference.default_canon in canons.bundled
+
+    for ns in all_naming_schemes():
+        ns.intid_by_name
+        ns.prefix_trie
+
+    ret = []
+    for config in parsers:
+        if not isinstance(config, dict):
+            config = { "naming_schemes": config, }
+
+        parser = bible_reference.cached_parser(pin=True, **config)
+        parser.abbreviation_regex
+        ret.append(parser)
+
+    if freeze and hasattr(gc, "freeze"):
+        gc.collect()
+        gc.freeze()
+
+    return ret
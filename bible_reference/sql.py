@@ -0,0 +1,304 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; -*-
+
+##  Copyright 2018–20 by Diedrich Vorberg <diedrich@tux4web.de>
+##
+##  All Rights Reserved
+##
+##  For more Information on orm see the README file.
+##
+##  This program is free software; you can redistribute it and/or modify
+##  it under the terms of the GNU General Public License as published by
+##  the Free Software Foundation; either version 2 of the License, or
+##  (at your option) any later version.
+##
+##  This program is distributed in the hope that it will be useful,
+##  but WITHOUT ANY WARRANTY; without even the implied warranty of
+##  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##  GNU General Public License for more details.
+##
+##  You should have received a copy of the GNU General Public License
+##  along with this program; if not, write to the Free Software
+##  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+##
+##  I have added a copy of the GPL in the file COPYING
+
+"""
+Generate SQL that lets a database compute canonical sort keys on its
+own, without Python in the server (compare postgresql/ and
+sqlite.py). Two lookup tables hold the data:
+
+  bibref_names (priority, ordinal, name, intid)
+      every ( ordinal, name, ) of the naming schemes with the intid it
+      stands for. Ordinals are '' for books without one, names are
+      normalized (lower case, no punctuation or whitespace). The
+      priority is the naming scheme’s position in the list.
+  bibref_books (canon, intid, position)
+      every canon’s book order.
+
+On top of these, for PostgreSQL, an SQL function
+
+  bibref_key(reference text, canon text DEFAULT 'default')
+
+and for SQLite, which has neither regular expressions nor SQL
+functions, triggers that keep a key column up to date.
+
+These understand simple references only: an optional ordinal, a one
+word book name or abbreviation of one (“Gen”, “1. Kor”, “Offenb.”),
+the chapter and optionally a verse. The rest is ignored, as parse()
+does. For these, the key is int_sort_index(), NULL for anything else.
+Book names are resolved as BibleReferenceParser does: names known
+exactly first, then unambiguous abbreviations. SQLite’s lower() folds
+ASCII letters only, so “RÖM” won’t be recognized there.
+
+The PostgreSQL function is declared IMMUTABLE so it may be used in
+indexes. That is only true as long as the lookup tables don’t change;
+REINDEX after regenerating them. It refers to the tables by their
+schema (public by default, see --schema), since indexes are rebuilt
+with an empty search_path when a pg_dump is restored.
+
+  python -m bible_reference.sql -d postgresql -n RGG_abbr,Luther84
+  python -m bible_reference.sql -d sqlite -t watchwords -c reference
+"""
+
+from __future__ import print_function, unicode_literals
+import sys, argparse
+
+from . import canons
+from .bible_reference import normalize_name
+
+dialects = ( "postgresql", "sqlite", )
+
+# The reference grammar of bibref_key(): ordinal, book name, chapter
+# and verse. [[:alpha:]] includes non-ASCII letters in PostgreSQL.
+postgresql_reference_re = (r"^(?:(\d)[.\s]?\s*)?([[:alpha:]]+)\.?\s*"
+                           r"\(?(\d+)(?:[,:]\(?(\d+))?")
+
+def quote(s):
+    """
+    Return `s` as an SQL string literal.
+    """
+    return "'" + s.replace("'", "''") + "'"
+
+def quote_identifier(s):
+    """
+    Return `s` as a delimited SQL identifier.
+    """
+    return '"' + s.replace('"', '""') + '"'
+
+def _qualified(name, schema):
+    if schema is None:
+        return name
+    else:
+        return "%s.%s" % ( quote_identifier(schema), name, )
+
+def lookup_tables(naming_schemes, canon_list, schema=None):
+    """
+    Return a list of SQL statements that (re-) create and fill the
+    bibref_names and bibref_books tables.
+
+    @param schema: Schema to create the tables in, None for the
+        first one on the search path. (SQLite triggers can’t refer
+        to tables in other databases.)
+    """
+    names = _qualified("bibref_names", schema)
+    books = _qualified("bibref_books", schema)
+
+    ret = [ "DROP TABLE IF EXISTS %s" % names,
+            "CREATE TABLE %s ( "
+            "priority INTEGER NOT NULL, ordinal TEXT NOT NULL, "
+            "name TEXT NOT NULL, intid TEXT NOT NULL, "
+            "PRIMARY KEY (ordinal, name, priority) )" % names,
+            "DROP TABLE IF EXISTS %s" % books,
+            "CREATE TABLE %s ( "
+            "canon TEXT NOT NULL, intid TEXT NOT NULL, "
+            "position INTEGER NOT NULL, PRIMARY KEY (canon, intid) )" % books, ]
+
+    rows = set()
+    for priority, ns in enumerate(naming_schemes):
+        for ( ordinal, name, ), intid in ns.intid_by_name.items():
+            name = normalize_name(name)
+            if name:
+                rows.add(( priority, ordinal or "", name, intid, ))
+
+    for row in sorted(rows):
+        ret.append("INSERT INTO %s VALUES (%i, %s, %s, %s)" % (
+            names, row[0], quote(row[1]), quote(row[2]), quote(row[3]), ))
+
+    for canon in canon_list:
+        for position, intid in enumerate(canon.book_ids):
+            ret.append("INSERT INTO %s VALUES (%s, %s, %i)" % (
+                books, quote(canon.name), quote(intid), position, ))
+
+    return ret
+
+def _intid_lookup(ordinal, word, schema=None):
+    """
+    SQL expression for the intid of the book named `word` (lower case)
+    with `ordinal` ('' if none), both SQL expressions themselves.
+    """
+    return ("coalesce("
+            "(SELECT n.intid FROM %(names)s n"
+            " WHERE n.ordinal = %(o)s AND n.name = %(w)s"
+            " ORDER BY n.priority LIMIT 1), "
+            "(SELECT min(n.intid) FROM %(names)s n"
+            " WHERE n.ordinal = %(o)s AND n.name LIKE %(w)s || '%%'"
+            " GROUP BY n.priority HAVING count(DISTINCT n.intid) = 1"
+            " ORDER BY n.priority LIMIT 1))") % {
+                "o": ordinal, "w": word,
+                "names": _qualified("bibref_names", schema), }
+
+def postgresql_function(schema="public"):
+    """
+    Return the CREATE FUNCTION statement for bibref_key().
+
+    @param schema: The schema of the lookup tables, which is where the
+        function is created, too.
+    """
+    return """CREATE OR REPLACE FUNCTION %(function)s(reference text,
+                                      canon text DEFAULT 'default')
+  RETURNS integer LANGUAGE sql IMMUTABLE STRICT
+AS $$
+-- Bitwise operators have equal precedence in SQL.
+SELECT ((b.position + 1) << 16) | (m[3]::integer << 8)
+       | coalesce(m[4]::integer, 0)
+  FROM pg_catalog.regexp_match($1, %(regex)s) AS m,
+       %(books)s b
+ WHERE b.canon = $2
+   AND b.intid = %(intid)s
+$$""" % { "function": _qualified("bibref_key", schema),
+          "regex": quote(postgresql_reference_re),
+          "books": _qualified("bibref_books", schema),
+          "intid": _intid_lookup("coalesce(m[1], '')", "lower(m[2])",
+                                 schema), }
+
+def sqlite_key_expression(column, canon="default"):
+    """
+    Return an SQLite expression for the sort key of the reference in
+    `column` (any SQL expression), NULL if it can’t be parsed. The
+    grammar is that of postgresql_function(), spelled out using
+    string functions, one step per nested sub-select.
+    """
+    def strip(ch, x):
+        # Remove one leading `ch` from x.
+        return "(CASE WHEN %s GLOB '%s*' THEN substr(%s, 2) ELSE %s END)" % (
+            x, ch, x, x, )
+
+    # The book name ends at the first space, period, parenthesis or
+    # digit.
+    ends = [ "coalesce(nullif(instr(s, '%s'), 0), length(s) + 1)" % ch
+             for ch in " .(0123456789" ]
+
+    steps = [
+        # Split off the ordinal.
+        "SELECT CASE WHEN r GLOB '[0-9]*' THEN substr(r, 1, 1)"
+        " ELSE '' END AS o,"
+        " CASE WHEN r NOT GLOB '[0-9]*' THEN r"
+        " WHEN substr(r, 2, 1) IN ('.', ' ') THEN ltrim(substr(r, 3))"
+        " ELSE ltrim(substr(r, 2)) END AS s",
+        "SELECT o, s, min(%s) AS p" % ", ".join(ends),
+        "SELECT o, lower(substr(s, 1, p - 1)) AS w, substr(s, p) AS t",
+        # After the name: optional period, spaces and parenthesis.
+        "SELECT o, w, ltrim(%s) AS t" % strip(".", "t"),
+        "SELECT o, w, %s AS t" % strip("(", "t"),
+        "SELECT o, w, t, ltrim(t, '0123456789') AS u",
+        "SELECT o, w, t GLOB '[0-9]*' AS has_chapter,"
+        " CAST(t AS INTEGER) AS chapter, substr(u, 1, 1) AS d,"
+        " %s AS v" % strip("(", "substr(u, 2)"), ]
+
+    query = "SELECT %s AS r" % column
+    for step in steps:
+        query = "%s FROM (%s)" % ( step, query, )
+
+    # Bitwise operators have equal precedence in SQL.
+    return ("(SELECT ((b.position + 1) << 16) | (k.chapter << 8)"
+            " | CASE WHEN k.d IN (',', ':') AND k.v GLOB '[0-9]*'"
+            " THEN CAST(k.v AS INTEGER) ELSE 0 END"
+            " FROM (%(query)s) AS k, bibref_books b"
+            " WHERE k.has_chapter AND k.w <> '' AND k.w NOT GLOB '*[%%_]*'"
+            " AND b.canon = %(canon)s AND b.intid = %(intid)s)") % {
+                "query": query, "canon": quote(canon),
+                "intid": _intid_lookup("k.o", "k.w"), }
+
+def sqlite_triggers(table, column, key_column="bibref_key", canon="default"):
+    """
+    Return SQL statements that add `key_column` to `table`, fill it
+    with the sort keys of the references in `column` and create
+    triggers that keep it up to date. Create an index on it as you
+    need.
+    """
+    table_name = quote_identifier(table)
+    column_name = quote_identifier(column)
+    key_name = quote_identifier(key_column)
+
+    def expression(prefix):
+        return sqlite_key_expression(prefix + column_name, canon)
+
+    name = "%s_%s" % ( table, key_column, )
+    update = ("UPDATE %s SET %s = %s WHERE rowid = NEW.rowid;" % (
+        table_name, key_name, expression("NEW."), ))
+
+    return [ "ALTER TABLE %s ADD COLUMN %s INTEGER" % (
+                 table_name, key_name, ),
+             "UPDATE %s SET %s = %s" % ( table_name, key_name,
+                                         expression(""), ),
+             "CREATE TRIGGER %s AFTER INSERT ON %s BEGIN %s END" % (
+                 quote_identifier(name + "_insert"), table_name, update, ),
+             "CREATE TRIGGER %s AFTER UPDATE OF %s ON %s BEGIN %s END" % (
+                 quote_identifier(name + "_update"), column_name,
+                 table_name, update, ), ]
+
+def main(argv=None):
+    from .cli import naming_scheme_list
+
+    parser = argparse.ArgumentParser(description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-d", "--dialect", choices=dialects,
+                        default="postgresql")
+    parser.add_argument("-n", "--naming-schemes", default="RGG_abbr",
+                        help="Comma separated naming schemes, in the "
+                        "order of priority (default: RGG_abbr)")
+    parser.add_argument("--canons", default=None,
+                        help="Comma separated canons (default: all "
+                        "bundled canons)")
+    parser.add_argument("-t", "--table", default=None,
+                        help="SQLite: table to add a key column to")
+    parser.add_argument("-c", "--column", default="reference",
+                        help="SQLite: column holding the references")
+    parser.add_argument("-k", "--key-column", default="bibref_key")
+    parser.add_argument("--canon", default="default",
+                        help="SQLite: canon for the key column")
+    parser.add_argument("-s", "--schema", default="public",
+                        help="PostgreSQL: schema for the tables and "
+                        "function (default: public)")
+    args = parser.parse_args(argv)
+
+    try:
+        schemes = naming_scheme_list(args.naming_schemes)
+        if args.canons is None:
+            canon_list = list(canons.bundled)
+        else:
+            canon_list = [ canons.by_name(name.strip())
+                           for name in args.canons.split(",") ]
+    except (argparse.ArgumentTypeError, IOError) as exc:
+        parser.error(str(exc))
+
+    if args.dialect == "postgresql":
+        statements = lookup_tables(schemes, canon_list, args.schema)
+        statements.append(postgresql_function(args.schema))
+    else:
+        statements = lookup_tables(schemes, canon_list)
+        if args.table is not None:
+            statements.extend(sqlite_triggers(args.table, args.column,
+                                              args.key_column, args.canon))
+
+    out = sys.stdout
+    out.write("BEGIN;\n")
+    for statement in statements:
+        out.write(statement + ";\n")
+    out.write("COMMIT;\n")
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; -*-
+
+##  Copyright 2018–20 by Diedrich Vorberg <diedrich@tux4web.de>
+##
+##  All Rights Reserved
+##
+##  For more Information on orm see the README file.
+##
+##  This program is free software; you can redistribute it and/or modify
+##  it under the terms of the GNU General Public License as published by
+##  the Free Software Foundation; either version 2 of the License, or
+##  (at your option) any later version.
+##
+##  This program is distributed in the hope that it will be useful,
+##  but WITHOUT ANY WARRANTY; without even the implied warranty of
+##  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##  GNU General Public License for more details.
+##
+##  You should have received a copy of the GNU General Public License
+##  along with this program; if not, write to the Free Software
+##  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+##
+##  I have added a copy of the GPL in the file COPYING
+
+"""
+SQL functions for SQLite, the counterpart of the PL/Python functions
+in postgresql/. register_functions() defines, on a sqlite3
+connection:
+
+  bibref_index(text)      int_sort_index() of the reference
+  bibref_normalize(text)  the reference represented using the output
+                          naming scheme
+  bibref_start(text)      the key of the first verse referenced
+  bibref_end(text)        the key of the last verse referenced, 255
+                          standing for “to the end” for the verse
+                          and chapter bytes
+
+Text that is not a Bible reference yields NULL, so do references to
+books that are not part of the canon for the keys. The functions are
+deterministic, so they may be used in expression indexes:
+
+  CREATE INDEX watchwords_bibref ON watchwords(bibref_index(reference));
+  SELECT reference FROM watchwords ORDER BY bibref_index(reference);
+
+  CREATE INDEX watchwords_span ON watchwords(bibref_start(reference),
+                                             bibref_end(reference));
+  SELECT reference FROM watchwords
+   WHERE bibref_start(reference) <= :end
+     AND bibref_end(reference) >= :start;
+
+Every connection that modifies such a table (or queries it using these
+functions) must register the functions with the same arguments first.
+"""
+
+from __future__ import print_function, unicode_literals
+import functools
+
+from .bible_reference import default_canon, cached_parser, sort_index
+
+def start_key(reference):
+    """
+    Return the int_sort_index() of `reference`, None if its book is
+    not part of its canon.
+    """
+    position = reference.book.canon.index.get(reference.book.intid)
+    if position is None:
+        return None
+    return sort_index(position, reference.chapter, reference.verse)
+
+def end_key(reference):
+    """
+    Return the sort key of the last verse `reference` covers (see
+    BibleReference.span_end()), with chapter or verse 255 meaning “to
+    the end of the book or chapter”. None if the book is not part of
+    the canon.
+    """
+    position = reference.book.canon.index.get(reference.book.intid)
+    if position is None:
+        return None
+
+    if reference.chapter is None:
+        return sort_index(position, 255, 255)
+
+    end_chapter, end_verse = reference.span_end
+    if end_chapter is None:
+        return sort_index(position, 255, 255)
+    elif end_chapter < reference.chapter:
+        end_chapter, end_verse = reference.chapter, reference.verse
+
+    if end_verse is None:
+        end_verse = 255
+
+    return sort_index(position, min(end_chapter, 255), min(end_verse, 255))
+
+def register_functions(connection, naming_schemes=None, canon=default_canon,
+                       output_scheme=None, cache_size=4096):
+    """
+    Define the bibref_*() functions on a sqlite3 connection.
+
+    @param naming_schemes: Used to parse the references, defaults to
+        bible_reference.default_naming_scheme.
+    @param canon: The canon that determines the sort order.
+    @param output_scheme: The naming scheme for bibref_normalize(),
+        defaults to the first of `naming_schemes`.
+    @param cache_size: How many parsed strings to remember. Sorting
+        and indexing call the functions for the same string several
+        times.
+    """
+    parser = cached_parser(naming_schemes, canon)
+    if output_scheme is None:
+        output_scheme = parser.naming_schemes[0]
+
+    @functools.lru_cache(maxsize=cache_size)
+    def parse(s):
+        if s is None:
+            return None
+        else:
+            return parser.parse_or_none(s)
+
+    def function(f):
+        def wrapper(s):
+            reference = parse(s)
+            if reference is None:
+                return None
+            else:
+                return f(reference)
+        return wrapper
+
+    for name, f in ( ( "bibref_index", start_key, ),
+                     ( "bibref_normalize",
+                       lambda br: br.represent_using(output_scheme), ),
+                     ( "bibref_start", start_key, ),
+                     ( "bibref_end", end_key, ), ):
+        connection.create_function(name, 1, function(f), deterministic=True)
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; -*-
+
+##  Copyright 2018–20 by Diedrich Vorberg <diedrich@tux4web.de>
+##
+##  All Rights Reserved
+##
+##  For more Information on orm see the README file.
+##
+##  This program is free software; you can redistribute it and/or modify
+##  it under the terms of the GNU General Public License as published by
+##  the Free Software Foundation; either version 2 of the License, or
+##  (at your option) any later version.
+##
+##  This program is distributed in the hope that it will be useful,
+##  but WITHOUT ANY WARRANTY; without even the implied warranty of
+##  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##  GNU General Public License for more details.
+##
+##  You should have received a copy of the GNU General Public License
+##  along with this program; if not, write to the Free Software
+##  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+##
+##  I have added a copy of the GPL in the file COPYING
+
+"""
+Sorting and merging streams of Bible references in canonical order
+without holding all of them in memory. All references in a stream
+must belong to the same canon; mixing canons raises CanonMismatch.
+"""
+
+from __future__ import print_function, unicode_literals
+import heapq, tempfile, os.path as op
+
+from .bible_reference import check_canon
+from .table import ReferenceTable
+
+def sort_key(reference):
+    """
+    The canonical sort key of a BibleReference.
+    """
+    return reference.int_sort_index()
+
+class _CanonGuard:
+    """
+    Make sure all references passing through belong to one canon, the
+    first one seen unless provided.
+    """
+    def __init__(self, canon=None):
+        self.canon = canon
+
+    def __call__(self, references):
+        for reference in references:
+            if self.canon is None:
+                self.canon = reference.book.canon
+            check_canon(reference, self.canon)
+            yield reference
+
+def merge(*iterables, **kw):
+    """
+    Merge iterables of BibleReferences, each sorted in canonical
+    order, into one sorted iterator. References with equal keys are
+    yielded in the order of the iterables. The optional keyword
+    argument `canon` sets the canon required; it defaults to that of
+    the first reference.
+    """
+    guard = _CanonGuard(kw.pop("canon", None))
+    if kw:
+        raise TypeError("Unexpected keyword arguments: %s" % ", ".join(kw))
+
+    return guard(heapq.merge(*iterables, key=sort_key))
+
+def external_sort(references, run_size=100000, tmpdir=None, canon=None):
+    """
+    Yield the BibleReferences from the iterable `references` in
+    canonical order (stable), keeping at most `run_size` of them in
+    memory. Whenever that many have accumulated, they are sorted and
+    written to a temporary file as a ReferenceTable (see table.py).
+    At the end, these runs are memory-mapped and merged.
+
+    @tmpdir: Directory for the temporary files, default is the
+        system’s.
+    @canon: The canon required, defaults to that of the first
+        reference.
+
+    The references yielded are restored from the runs. They use the
+    naming scheme of the first reference in the input.
+    """
+    guard = _CanonGuard(canon)
+    buffer = []
+    runs = []
+    naming_scheme = None
+
+    with tempfile.TemporaryDirectory(dir=tmpdir,
+                                     prefix="bibref-sort-") as directory:
+        def spill():
+            table = ReferenceTable.from_references(
+                sorted(buffer, key=sort_key), guard.canon, naming_scheme)
+            path = op.join(directory, "run-%06i" % len(runs))
+            with open(path, "wb") as fp:
+                table.write(fp)
+            runs.append(path)
+            del buffer[:]
+
+        for reference in guard(references):
+            if naming_scheme is None:
+                naming_scheme = reference.naming_scheme
+
+            buffer.append(reference)
+            if len(buffer) >= run_size:
+                spill()
+
+        if not runs:
+            # Everything fit into memory.
+            for reference in sorted(buffer, key=sort_key):
+                yield reference
+        else:
+            if buffer:
+                spill()
+
+            tables = [ ReferenceTable.load(path, naming_scheme)
+                       for path in runs ]
+            for reference in heapq.merge(*tables, key=sort_key):
+                yield reference
@@ -0,0 +1,337 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; -*-
+
+##  Copyright 2018–20 by Diedrich Vorberg <diedrich@tux4web.de>
+##
+##  All Rights Reserved
+##
+##  For more Information on orm see the README file.
+##
+##  This program is free software; you can redistribute it and/or modify
+##  it under the terms of the GNU General Public License as published by
+##  the Free Software Foundation; either version 2 of the License, or
+##  (at your option) any later version.
+##
+##  This program is distributed in the hope that it will be useful,
+##  but WITHOUT ANY WARRANTY; without even the implied warranty of
+##  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##  GNU General Public License for more details.
+##
+##  You should have received a copy of the GNU General Public License
+##  along with this program; if not, write to the Free Software
+##  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+##
+##  I have added a copy of the GPL in the file COPYING
+
+"""
+A ReferenceTable stores Bible references column by column in typed
+arrays instead of as BibleReference objects. That takes a fraction of
+the memory and can be written to disk and read back (memory-mapped)
+without copying.
+
+Columns (0 stands for None throughout)
+
+  book         B  index of the book in the table’s canon
+  chapter      H
+  verse        H
+  end_chapter  H  end of the span, see BibleReference.span_end
+  end_verse    H  0 = to the end of the chapter
+  range_offset I  offset of the range string in the string pool
+  range_length H  its length in bytes
+
+Range strings are stored UTF-8 encoded in a string pool shared by a
+table and its slices; every distinct range is stored only once.
+
+Binary format (all integers little-endian)
+
+  header   24 bytes  struct "<8sIIH6x": magic b"BIBREFT1", number of
+                     rows, size of the string pool in bytes, length of
+                     the canon name in bytes
+  canon    the canon’s name, UTF-8
+  columns  in the order above, each rows × itemsize bytes
+  pool     the string pool
+
+Every section is padded with zero bytes to a multiple of 8 bytes, so
+each column may be cast() from a memoryview in place.
+"""
+
+from __future__ import print_function, unicode_literals
+import struct, sys, mmap, array
+
+from .bible_reference import BibleReference, BiblicalBook, \
+    default_canon, sort_index, check_canon, _padded
+from . import canons
+
+magic = b"BIBREFT1"
+header = struct.Struct("<8sIIH6x")
+
+columns = ( ( "book", "B", ),
+            ( "chapter", "H", ),
+            ( "verse", "H", ),
+            ( "end_chapter", "H", ),
+            ( "end_verse", "H", ),
+            ( "range_offset", "I", ),
+            ( "range_length", "H", ), )
+
+class StringPool:
+    """
+    Append-only store of UTF-8 encoded strings, each stored once.
+    """
+    def __init__(self, data=b""):
+        self.data = data
+        self._offsets = None
+
+    def add(self, s):
+        """
+        Return ( offset, length, ) of s in the pool, adding it if
+        necessary.
+        """
+        if self._offsets is None:
+            # Pools loaded from a buffer are copied once they are
+            # modified. The strings already there are not re-used.
+            self.data = bytearray(self.data)
+            self._offsets = {}
+
+        ret = self._offsets.get(s)
+        if ret is None:
+            encoded = s.encode("utf-8")
+            ret = ( len(self.data), len(encoded), )
+            self.data += encoded
+            self._offsets[s] = ret
+
+        return ret
+
+    def get(self, offset, length):
+        return bytes(self.data[offset:offset+length]).decode("utf-8")
+
+    def __len__(self):
+        return len(self.data)
+
+
+class ReferenceTable:
+    """
+    A column-oriented container of Bible references from one canon.
+    Indexing returns BibleReference objects, slicing returns a
+    ReferenceTable.
+    """
+    def __init__(self, canon=default_canon, naming_scheme=None):
+        """
+        @canon: All references in the table must belong to this canon.
+        @naming_scheme: Passed on to the BibleReference objects
+            returned.
+        """
+        self.canon = canon
+        self.naming_scheme = naming_scheme
+        self.pool = StringPool()
+        for name, typecode in columns:
+            setattr(self, name, array.array(typecode))
+
+    @classmethod
+    def from_references(cls, references, canon=default_canon,
+                        naming_scheme=None):
+        ret = cls(canon, naming_scheme)
+        ret.extend(references)
+        return ret
+
+    def _derived(self, columns_by_name):
+        """
+        Return a ReferenceTable sharing our canon and pool with the
+        columns provided.
+        """
+        ret = self.__class__.__new__(self.__class__)
+        ret.canon = self.canon
+        ret.naming_scheme = self.naming_scheme
+        ret.pool = self.pool
+        for name, data in columns_by_name.items():
+            setattr(ret, name, data)
+        return ret
+
+    def _make_writable(self):
+        # Columns read from a buffer are memoryviews. Copy them into
+        # arrays before modifying anything.
+        for name, typecode in columns:
+            column = getattr(self, name)
+            if not isinstance(column, array.array):
+                setattr(self, name, array.array(typecode, column))
+
+    def append(self, reference):
+        """
+        Append a BibleReference to the table. Raises CanonMismatch if
+        it does not belong to our canon.
+        """
+        check_canon(reference, self.canon)
+
+        self._make_writable()
+
+        end_chapter, end_verse = reference.span_end
+        offset, length = self.pool.add(reference.range)
+
+        self.book.append(self.canon.index[reference.book.intid])
+        self.chapter.append(reference.chapter or 0)
+        self.verse.append(reference.verse or 0)
+        self.end_chapter.append(end_chapter or 0)
+        self.end_verse.append(end_verse or 0)
+        self.range_offset.append(offset)
+        self.range_length.append(length)
+
+    def extend(self, references):
+        for reference in references:
+            self.append(reference)
+
+    def __len__(self):
+        return len(self.book)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return self._derived(dict([ ( name, getattr(self, name)[idx], )
+                                        for name, typecode in columns ]))
+        else:
+            if idx < 0:
+                idx += len(self)
+            if idx < 0 or idx >= len(self):
+                raise IndexError("ReferenceTable index out of range")
+
+            book = BiblicalBook(self.canon.book_ids[self.book[idx]],
+                                self.canon)
+            return BibleReference(book,
+                                  self.chapter[idx] or None,
+                                  self.verse[idx] or None,
+                                  self.pool.get(self.range_offset[idx],
+                                                self.range_length[idx]),
+                                  self.naming_scheme)
+
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self[idx]
+
+    def sort_key(self, idx):
+        """
+        Return the canonical sort key of row `idx`, the same as the
+        BibleReference’s int_sort_index().
+        """
+        return sort_index(self.book[idx], self.chapter[idx], self.verse[idx])
+
+    def sort_keys(self):
+        """
+        Return an array of the canonical sort keys of all rows.
+        """
+        return array.array("I", [ self.sort_key(idx)
+                                  for idx in range(len(self)) ])
+
+    def _take(self, indices):
+        return self._derived(dict(
+            [ ( name, array.array(typecode,
+                                  [ getattr(self, name)[idx]
+                                    for idx in indices ]), )
+              for name, typecode in columns ]))
+
+    def sorted(self):
+        """
+        Return a new table with the rows in canonical order. Equal
+        keys keep their order.
+        """
+        return self._take(sorted(range(len(self)), key=self.sort_key))
+
+    def sort(self):
+        """
+        Sort the table in place.
+        """
+        other = self.sorted()
+        for name, typecode in columns:
+            setattr(self, name, getattr(other, name))
+
+    def groupby_book(self):
+        """
+        Yield ( intid, ReferenceTable, ) pairs for every book in the
+        table in canonical order. Within a book, rows keep their order.
+        """
+        by_book = {}
+        for idx, book in enumerate(self.book):
+            by_book.setdefault(book, []).append(idx)
+
+        for book in sorted(by_book.keys()):
+            yield self.canon.book_ids[book], self._take(by_book[book])
+
+    # Serialization
+
+    def tobytes(self):
+        """
+        Return the table in the binary format documented above.
+        """
+        canon_name = self.canon.name.encode("utf-8")
+        ret = [ header.pack(magic, len(self), len(self.pool),
+                            len(canon_name)),
+                canon_name, ]
+
+        for name, typecode in columns:
+            column = getattr(self, name)
+            if not isinstance(column, array.array):
+                column = array.array(typecode, column)
+            if sys.byteorder != "little":
+                column = array.array(typecode, column)
+                column.byteswap()
+            ret.append(column.tobytes())
+
+        ret.append(bytes(self.pool.data))
+
+        return b"".join([ part + b"\0" * (_padded(len(part)) - len(part))
+                          for part in ret ])
+
+    def write(self, fp):
+        """
+        Write the table to a binary file object.
+        """
+        fp.write(self.tobytes())
+
+    @classmethod
+    def frombuffer(cls, buffer, naming_scheme=None):
+        """
+        Create a table from a buffer containing the binary format
+        (bytes, mmap…). On little-endian machines, the columns and the
+        string pool are memoryviews into that buffer; nothing is
+        copied until the table is modified.
+        """
+        view = memoryview(buffer).cast("B")
+        if len(view) < header.size:
+            raise IOError("Not a ReferenceTable (too short).")
+
+        tag, rows, pool_size, canon_length = header.unpack_from(view)
+        if tag != magic:
+            raise IOError("Not a ReferenceTable (bad magic).")
+
+        offset = _padded(header.size)
+        canon_name = bytes(view[offset:offset+canon_length]).decode("utf-8")
+        offset += _padded(canon_length)
+
+        ret = cls.__new__(cls)
+        ret.canon = canons.by_name(canon_name)
+        ret.naming_scheme = naming_scheme
+
+        for name, typecode in columns:
+            size = rows * array.array(typecode).itemsize
+            if offset + size > len(view):
+                raise IOError("ReferenceTable truncated.")
+
+            column = view[offset:offset+size].cast(typecode)
+            if sys.byteorder != "little":
+                column = array.array(typecode, column)
+                column.byteswap()
+            setattr(ret, name, column)
+            offset += _padded(size)
+
+        if offset + pool_size > len(view):
+            raise IOError("ReferenceTable truncated.")
+        ret.pool = StringPool(view[offset:offset+pool_size])
+
+        return ret
+
+    @classmethod
+    def load(cls, filepath, naming_scheme=None):
+        """
+        Memory-map the file at `filepath` and return a table reading
+        from it.
+        """
+        with open(filepath, "rb") as fp:
+            buffer = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+
+        return cls.frombuffer(buffer, naming_scheme)
@@ -18,6 +18,15 @@ setuptools.setup(
     package_data={"": ["*.names", "*.canon", "*.info"]},
     include_package_data=True,
 
+    extras_require={
+        # The optional matcher backend, see backends.py.
+        "regex": [ "regex", ],
+    },
+
+    entry_points={
+        "console_scripts": [ "bibref=bible_reference.cli:main", ],
+    },
+
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: GNU General Public License v2 (GPLv2)",
@@ -0,0 +1,87 @@
+# -*- coding: utf-8; -*-
+
+##  Copyright 2018–20 by Diedrich Vorberg <diedrich@tux4web.de>
+##
+##  All Rights Reserved
+##
+##  For more Information on orm see the README file.
+##
+##  This program is free software; you can redistribute it and/or modify
+##  it under the terms of the GNU General Public License as published by
+##  the Free Software Foundation; either version 2 of the License, or
+##  (at your option) any later version.
+##
+##  This program is distributed in the hope that it will be useful,
+##  but WITHOUT ANY WARRANTY; without even the implied warranty of
+##  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##  GNU General Public License for more details.
+##
+##  You should have received a copy of the GNU General Public License
+##  along with this program; if not, write to the Free Software
+##  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+##
+##  I have added a copy of the GPL in the file COPYING
+
+"""
+Conformance tests: Every matcher backend must yield the same
+BibleReference objects as the default re backend.
+"""
+
+import unittest
+from bible_reference import BibleReferenceParser
+from bible_reference.backends import available_backends
+from bible_reference.naming_schemes import RGG_abbr, RGG, Luther84, \
+    Luther84_abbr, SBL, SBL_abbr
+
+naming_schemes = [ RGG_abbr, Luther84, Luther84_abbr, SBL_abbr, RGG, SBL, ]
+
+references = [ "Gen 1,1", "Röm 3,22", "1. Kor 13,1-3", "1 Kor 13,4–7",
+               "2Kor 5,17", "1 Sam 3,1-4,2", "Joh 3,16f", "Joh 1,1ff",
+               "Ps 23", "Ps 119,105", "Jo 3,1", "Joel 2,28", "Jon 2",
+               "Phil 2,5-11", "Sirach 3,4", "Mt 5,3 (vgl. 6,1)",
+               "Mt (5,1); 5,3-12", "Röm 1-3", "1.Mose 1,1", "Rom 8:28",
+               "1 Cor 13:13", "Offb 21,1.4", "Lk 2,1-20; 3,1", "Jak 2,14a",
+               "Hebräer 11,1", ]
+
+text = ("Nach Röm 3,22 und 1. Kor 13,1-3 (vgl. Joh 3,16f) sowie Ps 23 "
+        "erinnert Mt 5,3 (vgl. 6,1) an Jesus Sirach 3,4; cf. Rom 8:28 and "
+        "1 Cor 13:13. Generation 5 and Joel 2,28 or Lk 2,1-20; 3,1.")
+
+class BackendConformanceTests(unittest.TestCase):
+    def parsers(self):
+        reference = BibleReferenceParser(naming_schemes)
+        for name in available_backends():
+            yield name, reference, BibleReferenceParser(naming_schemes,
+                                                         backend=name)
+
+    def assertSameReferences(self, a, b):
+        self.assertEqual([ (repr(br), br.int_sort_index(),) for br in a ],
+                         [ (repr(br), br.int_sort_index(),) for br in b ])
+
+    def test_available(self):
+        self.assertIn("re", available_backends())
+        self.assertRaises(ValueError, BibleReferenceParser, backend="perl")
+
+    def test_parse(self):
+        for name, reference, parser in self.parsers():
+            with self.subTest(backend=name):
+                self.assertSameReferences(
+                    [ reference.parse(s) for s in references ],
+                    [ parser.parse(s) for s in references ])
+
+    def test_finditer(self):
+        for name, reference, parser in self.parsers():
+            with self.subTest(backend=name):
+                self.assertSameReferences(reference.finditer(text),
+                                          parser.finditer(text))
+
+    @unittest.skipUnless("regex" in available_backends(),
+                         "The regex module is not installed.")
+    def test_regex(self):
+        parser = BibleReferenceParser(naming_schemes, backend="regex")
+        self.assertEqual(repr(parser.parse("1. Kor 13,1-3")),
+                         "<1Cor 13:1 '13,1–3'>")
+
+
+if __name__ == '__main__':
+    unittest.main()
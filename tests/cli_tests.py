@@ -0,0 +1,89 @@
+# -*- coding: utf-8; -*-
+
+##  Copyright 2018–20 by Diedrich Vorberg <diedrich@tux4web.de>
+##
+##  All Rights Reserved
+##
+##  For more Information on orm see the README file.
+##
+##  This program is free software; you can redistribute it and/or modify
+##  it under the terms of the GNU General Public License as published by
+##  the Free Software Foundation; either version 2 of the License, or
+##  (at your option) any later version.
+##
+##  This program is distributed in the hope that it will be useful,
+##  but WITHOUT ANY WARRANTY; without even the implied warranty of
+##  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##  GNU General Public License for more details.
+##
+##  You should have received a copy of the GNU General Public License
+##  along with this program; if not, write to the Free Software
+##  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+##
+##  I have added a copy of the GPL in the file COPYING
+
+
+import unittest, subprocess, sys, json
+
+text = """Wie Röm 3,22 sagt und Joh 3,16f auch.
+Gen 1,1
+Xyz
+Ps 23
+Joh 1,1
+"""
+
+def run(args, input=text):
+    process = subprocess.run(
+        [ sys.executable, "-m", "bible_reference.cli", ] + list(args),
+        input=input.encode("utf-8"), stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE, check=True)
+    return ( process.stdout.decode("utf-8").splitlines(),
+             process.stderr.decode("utf-8").splitlines(), )
+
+def bibref(*args):
+    return run(args)[0]
+
+class CommandLineTests(unittest.TestCase):
+    def test_extract(self):
+        rows = [ json.loads(line) for line in bibref("extract") ]
+        self.assertEqual([ ( row["line"], row["start"], row["end"],
+                             row["reference"], ) for row in rows ],
+                         [ (1, 4, 12, "Röm 3,22"), (1, 22, 31, "Joh 3,16f"),
+                           (2, 0, 7, "Gen 1,1"), (4, 0, 5, "Ps 23"),
+                           (5, 0, 7, "Joh 1,1") ])
+
+    def test_normalize(self):
+        self.assertEqual(bibref("normalize", "-o", "SBL_abbr")[0],
+                         "Wie Rom 3:22 sagt und John 3:16f auch.")
+
+    def test_sort(self):
+        expected = [ "Gen 1,1", "Ps 23", "Joh 1,1", ]
+        self.assertEqual(bibref("sort"), expected)
+        self.assertEqual(bibref("sort", "-j", "2", "--batch-size", "1",
+                                "--run-size", "2"), expected)
+        self.assertEqual(bibref("keys")[1], "65793\tGen 1,1")
+
+    def test_dirty_input(self):
+        dirty = "Röm 3,16 und 3 Kor 1\nGen 1,1\n"
+        for jobs in ( "1", "2", ):
+            out, err = run([ "extract", "-j", jobs, "--batch-size", "1", ],
+                           dirty)
+            self.assertEqual([ json.loads(line)["text"] for line in out ],
+                             [ "Röm 3,16", "Gen 1,1", ])
+            self.assertEqual(err, [ "-:1: Unknown book: 3 Kor", ])
+
+        # Zeph (Hp) is not part of the default canon.
+        out, err = run([ "extract", "-n", "SBL_abbr", ], "Zeph 3:4\n")
+        self.assertEqual(json.loads(out[0])["key"], None)
+        out, err = run([ "sort", "-n", "SBL_abbr", ], "Zeph 3:4\nGen 1:1\n")
+        self.assertEqual(( out, err, ), ( [ "Gen 1:1", ],
+                                          [ "-:1: Hp is not part of canon "
+                                            "default", ], ))
+
+        out, err = run([ "normalize", "-o", "SBL_abbr", ], dirty)
+        self.assertEqual(out, [ "Rom 3:16 und 3 Kor 1", "Gen 1:1", ])
+        self.assertEqual(err, [ "-:1: Unknown book: 3 Kor", ])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+# -*- coding: utf-8; -*-
+
+##  Copyright 2018–20 by Diedrich Vorberg <diedrich@tux4web.de>
+##
+##  All Rights Reserved
+##
+##  For more Information on orm see the README file.
+##
+##  This program is free software; you can redistribute it and/or modify
+##  it under the terms of the GNU General Public License as published by
+##  the Free Software Foundation; either version 2 of the License, or
+##  (at your option) any later version.
+##
+##  This program is distributed in the hope that it will be useful,
+##  but WITHOUT ANY WARRANTY; without even the implied warranty of
+##  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##  GNU General Public License for more details.
+##
+##  You should have received a copy of the GNU General Public License
+##  along with this program; if not, write to the Free Software
+##  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+##
+##  I have added a copy of the GPL in the file COPYING
+
+
+import unittest
+from bible_reference import BibleReferenceParser, CanonMismatch
+from bible_reference.bible_reference import BibleReference, BiblicalBook
+from bible_reference.naming_schemes import RGG_abbr, SBL_abbr
+from bible_reference.canons import LXX
+from bible_reference.compaction import compact, represent
+
+parser = BibleReferenceParser([ RGG_abbr, ])
+
+def compacted(*references, **kw):
+    return represent(compact([ parser.parse(s) for s in references ]), **kw)
+
+class CompactionTests(unittest.TestCase):
+    def test_adjacent(self):
+        self.assertEqual(compacted("Röm 3,1", "Röm 3,2", "Röm 3,3", "Röm 4"),
+                         "Röm 3,1–3; 4")
+        self.assertEqual(compacted("Joh 3,16ff", "Joh 4", "Joh 5"),
+                         "Joh 3,16ff; 4–5")
+        self.assertEqual(compacted("Joh 1,1-2,3", "Joh 2,4"), "Joh 1,1–2,4")
+
+    def test_overlaps(self):
+        self.assertEqual(compacted("Röm 4", "Röm 3,3", "Röm 3,1-2", "Röm 3,2",
+                                   "Gal 2,20", "Röm 3,5-8", "Röm 3,6-10",
+                                   "Gal 2,20"),
+                         "Röm 3,1–3; 3,5–10; 4; Gal 2,20")
+        self.assertEqual(compacted("Röm 3", "Röm 3,16", "Röm 4",
+                                   "Röm 5,1-3", naming_scheme=SBL_abbr),
+                         "Rom 3:1–5:3")
+
+    def test_canon_mismatch(self):
+        other = BibleReference(BiblicalBook("Gn", LXX), 1, 1)
+        self.assertRaises(CanonMismatch, compact,
+                          [ parser.parse("Gen 1,1"), other, ])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+# -*- coding: utf-8; -*-
+
+##  Copyright 2018–20 by Diedrich Vorberg <diedrich@tux4web.de>
+##
+##  All Rights Reserved
+##
+##  For more Information on orm see the README file.
+##
+##  This program is free software; you can redistribute it and/or modify
+##  it under the terms of the GNU General Public License as published by
+##  the Free Software Foundation; either version 2 of the License, or
+##  (at your option) any later version.
+##
+##  This program is distributed in the hope that it will be useful,
+##  but WITHOUT ANY WARRANTY; without even the implied warranty of
+##  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##  GNU General Public License for more details.
+##
+##  You should have received a copy of the GNU General Public License
+##  along with this program; if not, write to the Free Software
+##  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+##
+##  I have added a copy of the GPL in the file COPYING
+
+
+import unittest, tempfile, shutil
+from bible_reference import BibleReferenceParser
+from bible_reference.naming_schemes import RGG_abbr
+from bible_reference.concordance import Concordance
+
+class ConcordanceTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.parser = BibleReferenceParser([ RGG_abbr, ], prefilter=True)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_lookups(self):
+        concordance = Concordance(self.directory, self.parser)
+        concordance.add(1, "Siehe Röm 3,21-26 und Gen 1,1.")
+        concordance.add(2, "Röm 3 ganz, dazu Ps 23")
+        concordance.add(3, "Röm 3,1-4,2")
+
+        # Pending documents are found before they are committed.
+        self.assertEqual(concordance.verse("Rm", 3, 22),
+                         [ (1, 6), (2, 0), (3, 0) ])
+        concordance.commit()
+
+        self.assertEqual(concordance.verse("Rm", 3, 27), [ (2, 0), (3, 0) ])
+        self.assertEqual(concordance.verse("Rm", 4, 2), [ (3, 0) ])
+        self.assertEqual(concordance.verse("Rm", 4, 3), [])
+        self.assertEqual(concordance.chapter("Gn", 1), [ (1, 22) ])
+        self.assertEqual(concordance.documents("Rm", 3), [ 1, 2, 3 ])
+        self.assertEqual(concordance.documents("Ps", 23, 1), [ 2 ])
+
+    def test_dirty_document(self):
+        concordance = Concordance(self.directory, self.parser)
+        concordance.add(1, "Röm 3,1 und 3 Kor 1, dann Gen 1,1")
+        self.assertEqual(concordance.documents("Rm", 3, 1), [ 1 ])
+        self.assertEqual(concordance.documents("Gn", 1, 1), [ 1 ])
+        self.assertRaises(ValueError, concordance.add, 1, "Ps 23")
+
+    def test_incremental(self):
+        concordance = Concordance(self.directory, self.parser)
+        concordance.add(1, "Röm 3,22")
+        concordance.add(2, "Röm 3,22")
+        concordance.commit()
+
+        concordance.add(3, "Röm 3,22")
+        concordance.remove(1)
+        concordance.commit()
+        concordance.close()
+
+        concordance = Concordance(self.directory, self.parser)
+        self.assertEqual(concordance.documents("Rm", 3, 22), [ 2, 3 ])
+        self.assertEqual(len(concordance.segments), 2)
+
+        # A removed document may be added again.
+        concordance.add(1, "Joh 3,16 und Röm 3,22")
+        self.assertEqual(concordance.documents("Rm", 3, 22), [ 1, 2, 3 ])
+
+        concordance.compact()
+        self.assertEqual(len(concordance.segments), 1)
+        self.assertEqual(concordance.removed, {})
+        self.assertEqual(concordance.verse("Rm", 3, 22),
+                         [ (1, 13), (2, 0), (3, 0) ])
+        concordance.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
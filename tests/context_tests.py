@@ -0,0 +1,113 @@
+# -*- coding: utf-8; -*-
+
+##  Copyright 2018–20 by Diedrich Vorberg <diedrich@tux4web.de>
+##
+##  All Rights Reserved
+##
+##  For more Information on orm see the README file.
+##
+##  This program is free software; you can redistribute it and/or modify
+##  it under the terms of the GNU General Public License as published by
+##  the Free Software Foundation; either version 2 of the License, or
+##  (at your option) any later version.
+##
+##  This program is distributed in the hope that it will be useful,
+##  but WITHOUT ANY WARRANTY; without even the implied warranty of
+##  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##  GNU General Public License for more details.
+##
+##  You should have received a copy of the GNU General Public License
+##  along with this program; if not, write to the Free Software
+##  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+##
+##  I have added a copy of the GPL in the file COPYING
+
+
+from __future__ import print_function, unicode_literals
+import unittest
+
+from bible_reference import canons, BibleReferenceParser, naming_schemes \
+    as bundled, BibleReference, NamingScheme, cached_parser
+from bible_reference.bible_reference import _resolve_book
+from bible_reference.naming_schemes import RGG_abbr, RGG, Luther84, \
+    Luther84_abbr, SBL, SBL_abbr
+from bible_reference.context import Context
+
+naming_schemes = [ RGG_abbr, RGG, Luther84, Luther84_abbr, SBL, SBL_abbr, ]
+
+class ContextTests(unittest.TestCase):
+    def setUp(self):
+        self.context = Context(naming_schemes, [ canons.default, canons.LXX, ])
+
+    def test_lookup(self):
+        context = self.context
+        self.assertEqual(len(context), len(naming_schemes))
+        self.assertIs(context[0], RGG_abbr)
+
+        self.assertEqual(context.resolve_book(None, "röm"), ( "Rm", (), ))
+        self.assertEqual(context.resolve_book("1", "Cor"), ( "1Cor", (), ))
+        self.assertEqual(context.resolve_book(None, "Gene"), ( "Gn", (), ))
+        self.assertEqual(context.resolve_book(None, "Xyz"), ( None, (), ))
+
+        book = context.book_number["Gn"]
+        self.assertEqual(context.sort_key(book, 1, 1), 65793)
+        self.assertEqual(context.sort_key(book, 1, None,
+                                          context.canon_number["LXX"]), 65792)
+
+    def test_same_books(self):
+        # Every name of every bundled naming scheme resolves as it does
+        # without the Context, alone and with all of them.
+        all_schemes = [ getattr(bundled, name) for name in dir(bundled)
+                        if isinstance(getattr(bundled, name),
+                                      bundled.LazyNamingScheme) ]
+        for schemes in [ [ ns, ] for ns in all_schemes ] + [ all_schemes, ]:
+            context = Context(schemes, [ canons.default, ])
+            for ns in schemes:
+                for ordinal, name in ns.intid_by_name:
+                    self.assertEqual(context.resolve_book(ordinal, name),
+                                     _resolve_book(ordinal, name, schemes),
+                                     ( ns.name, ordinal, name, ))
+
+        context = Context([ RGG_abbr, ], [ canons.default, ])
+        self.assertEqual(repr(context.parser().parse("Phil 3,4")),
+                         repr(BibleReferenceParser([ RGG_abbr, ]).parse(
+                             "Phil 3,4")))
+
+    def test_parser(self):
+        s = ("Vgl. Röm 3,22 und 1. Kor 13,1-3 mit 2Kor 5,17 sowie "
+             "1 Sam 3,1-4,2 und Joh 3,16f. In Joel 2 and 1 Cor 13:4, "
+             "Sir 3,4.")
+        parser = self.context.parser()
+        self.assertIs(parser, self.context.parser())
+
+        found = list(parser.finditer(s))
+        self.assertEqual(found,
+                         list(BibleReferenceParser(naming_schemes).finditer(s)))
+        self.assertEqual(len(found), 8)
+        self.assertEqual(repr(parser.parse("Gene 1,1")), "<Gn 1:1 '1,1'>")
+
+        for br in found:
+            self.assertEqual(self.context.represent(br), str(br))
+            self.assertEqual(self.context.represent(br, SBL_abbr),
+                             br.represent_using(SBL_abbr))
+
+    def test_cached_parser(self):
+        context = self.context
+        self.assertIs(cached_parser(context), context.parser())
+        self.assertIs(cached_parser(context, canons.LXX),
+                      context.parser(canons.LXX))
+        self.assertEqual(repr(BibleReference.parse("Röm 3,22", context)),
+                         "<Rm 3:22 '3,22'>")
+
+    def test_scheme_indices(self):
+        # The Context doesn’t make its naming schemes build their own
+        # name index.
+        schemes = [ NamingScheme.internal("RGG_abbr"),
+                    NamingScheme.internal("SBL", ".", ":"), ]
+        context = Context(schemes, [ canons.default, ])
+        self.assertEqual(context.resolve_book(None, "Rom"), ( "Rm", (), ))
+        for ns in schemes:
+            self.assertIs(ns._intid_by_name, None)
+
+if __name__ == '__main__':
+    unittest.main()
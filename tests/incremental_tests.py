@@ -0,0 +1,98 @@
+# -*- coding: utf-8; -*-
+
+##  Copyright 2018–20 by Diedrich Vorberg <diedrich@tux4web.de>
+##
+##  All Rights Reserved
+##
+##  For more Information on orm see the README file.
+##
+##  This program is free software; you can redistribute it and/or modify
+##  it under the terms of the GNU General Public License as published by
+##  the Free Software Foundation; either version 2 of the License, or
+##  (at your option) any later version.
+##
+##  This program is distributed in the hope that it will be useful,
+##  but WITHOUT ANY WARRANTY; without even the implied warranty of
+##  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##  GNU General Public License for more details.
+##
+##  You should have received a copy of the GNU General Public License
+##  along with this program; if not, write to the Free Software
+##  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+##
+##  I have added a copy of the GPL in the file COPYING
+
+
+import unittest, random
+from bible_reference import BibleReferenceParser
+from bible_reference.naming_schemes import RGG_abbr, Luther84
+from bible_reference.incremental import IncrementalScanner
+
+parser = BibleReferenceParser([ RGG_abbr, Luther84, ])
+
+def spans(matches):
+    return [ ( start, end, repr(reference), )
+             for start, end, reference in matches ]
+
+class IncrementalScannerTests(unittest.TestCase):
+    def test_edit(self):
+        scanner = IncrementalScanner(parser, "Siehe Röm 3 und Joh 3,16.")
+        self.assertEqual(len(scanner.matches), 2)
+
+        # Complete the first reference.
+        added, removed = scanner.edit(11, 0, ",23")
+        self.assertEqual(scanner.text, "Siehe Röm 3,23 und Joh 3,16.")
+        self.assertEqual(spans(added), [ (6, 14, "<Rm 3:23 '3,23'>") ])
+        self.assertEqual(spans(removed), [ (6, 11, "<Rm 3:None '3'>") ])
+        self.assertEqual(scanner.matches[1][:2], (19, 27))
+
+        # Unrelated text changes nothing but the offsets.
+        added, removed = scanner.edit(0, 5, "Vergleiche")
+        self.assertEqual(( added, removed, ), ( [], [], ))
+        self.assertEqual(spans(scanner.matches),
+                         spans(parser.finditer_spans(scanner.text)))
+
+        # Destroy the second one.
+        added, removed = scanner.edit(27, 3, "a")
+        self.assertEqual(spans(added), [])
+        self.assertEqual(spans(removed), [ (24, 32, "<Jn 3:16 '3,16'>") ])
+
+    def test_random_edits(self):
+        fragments = [ "Röm 3,16", " und ", "Kol 1", "-3 x", ", x", "; 4 x",
+                      "Joh ", "3 x", "\n", "Gen 1,1f", " Text ", "Ps",
+                      " 23 x", "ff", "Rö", "m", ]
+        rnd = random.Random(0)
+        text = "".join([ rnd.choice(fragments) for a in range(100) ])
+        scanner = IncrementalScanner(parser, text, lookback=40)
+
+        for a in range(300):
+            offset = rnd.randint(0, len(scanner.text))
+            deleted = rnd.randint(0, min(5, len(scanner.text) - offset))
+            inserted = rnd.choice(fragments)
+            text = text[:offset] + inserted + text[offset+deleted:]
+            scanner.edit(offset, deleted, inserted)
+
+            self.assertEqual(scanner.text, text)
+            self.assertEqual(spans(scanner.matches),
+                             spans(parser.finditer_spans(
+                                 text, skip_unresolved=True)))
+
+    def test_unknown_book(self):
+        # “3 Kor” matches the grammar, but there is no such book.
+        scanner = IncrementalScanner(parser, "3 Kor 1 und Röm 3,1 und ")
+        self.assertEqual(spans(scanner.matches),
+                         [ (12, 19, "<Rm 3:1 '3,1'>") ])
+
+        added, removed = scanner.edit(24, 0, "3")
+        added, removed = scanner.edit(25, 0, " Kor 1")
+        self.assertEqual(( added, removed, ), ( [], [], ))
+        self.assertEqual(scanner.text, "3 Kor 1 und Röm 3,1 und 3 Kor 1")
+
+        # Making it a known book adds it.
+        added, removed = scanner.edit(24, 1, "1")
+        self.assertEqual(spans(added), [ (24, 31, "<1Cor 1:None '1'>") ])
+        self.assertEqual(removed, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
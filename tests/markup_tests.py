@@ -0,0 +1,115 @@
+# -*- coding: utf-8; -*-
+
+##  Copyright 2018–20 by Diedrich Vorberg <diedrich@tux4web.de>
+##
+##  All Rights Reserved
+##
+##  For more Information on orm see the README file.
+##
+##  This program is free software; you can redistribute it and/or modify
+##  it under the terms of the GNU General Public License as published by
+##  the Free Software Foundation; either version 2 of the License, or
+##  (at your option) any later version.
+##
+##  This program is distributed in the hope that it will be useful,
+##  but WITHOUT ANY WARRANTY; without even the implied warranty of
+##  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##  GNU General Public License for more details.
+##
+##  You should have received a copy of the GNU General Public License
+##  along with this program; if not, write to the Free Software
+##  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+##
+##  I have added a copy of the GPL in the file COPYING
+
+
+from __future__ import print_function, unicode_literals
+import unittest, re
+
+from bible_reference import BibleReferenceParser
+from bible_reference.naming_schemes import RGG_abbr, Luther84
+from bible_reference.markup import MarkupScanner, linkify
+
+document = ('<html><head><title>Röm 1,1</title>'
+            '<script>var x = "Gen 1,1 <p>";</script></head>'
+            '<body><p>Link: <a href=\'/x\'>Röm 3,16</a></p>'
+            '<p class="Joh 3,16">Vgl. Röm <i>3,16</i> und '
+            '1.&nbsp;Kor 13,4-7.</p><p>Siehe Röm <span title="x > y">3,16'
+            '</span></p><p>Gen</p><p>1,1</p><p>Siehe <!-- a > Ps 23 '
+            '--> Ex <b>3</b>,14 &amp; Mt 5,3</p>'
+            '<p><![CDATA[Vgl. Jes 40,3 <b>]]></p></body></html>')
+
+class MarkupTests(unittest.TestCase):
+    def setUp(self):
+        self.parser = BibleReferenceParser([ RGG_abbr, Luther84, ])
+
+    def scan(self, size):
+        scanner = MarkupScanner(self.parser, margin=16)
+        ret = []
+        for i in range(0, len(document), size):
+            ret.extend(scanner.feed(document[i:i+size]))
+        ret.extend(scanner.close())
+        return ret
+
+    def test_scanner(self):
+        matches = self.scan(len(document))
+        self.assertEqual([ match.text for match in matches ],
+                         [ "Röm 1,1", "Röm 3,16", "Röm 3,16",
+                           "1.\xa0Kor 13,4-7",
+                           "Röm 3,16", "Ex 3,14", "Mt 5,3", "Jes 40,3", ])
+        self.assertEqual([ [ document[start:end]
+                             for start, end in match.segments ]
+                           for match in matches ],
+                         [ [ "Röm 1,1", ], [ "Röm 3,16", ],
+                           [ "Röm ", "3,16", ],
+                           [ "1.&nbsp;Kor 13,4-7", ], [ "Röm ", "3,16", ],
+                           [ "Ex ", "3", ",14", ], [ "Mt 5,3", ],
+                           [ "Jes 40,3", ], ])
+        self.assertEqual(repr(matches[3].reference), "<1Cor 13:4 '13,4–7'>")
+        self.assertEqual([ match.linkable for match in matches ],
+                         [ False, False, True, True, True, True, True,
+                           False, ])
+
+        # The chunk size doesn’t matter.
+        expected = [ ( match.start, match.end, match.text, )
+                     for match in matches ]
+        for size in range(1, 40):
+            self.assertEqual([ ( match.start, match.end, match.text, )
+                               for match in self.scan(size) ], expected)
+
+    def test_long_comment(self):
+        # Data held back inside a comment stays short.
+        scanner = MarkupScanner(self.parser, margin=16)
+        scanner.feed("<p>Siehe <!--")
+        for i in range(1000):
+            scanner.feed(" Ps 23 - ")
+            self.assertLess(len(scanner._raw), 3)
+        scanner.feed("-->Röm 3,16")
+        self.assertEqual([ match.text for match in scanner.close() ],
+                         [ "Röm 3,16", ])
+
+    def test_linkify(self):
+        out = []
+        count = linkify(self.parser,
+                        [ document[i:i+5] for i in range(0, len(document), 5) ],
+                        out.append,
+                        lambda br: None if br.book.intid == "Mt"
+                                   else "/bible?ref=%s&x" % br.book.intid,
+                        margin=16)
+        self.assertEqual(count, 4)
+
+        out = "".join(out)
+        self.assertIn('Vgl. <a href="/bible?ref=Rm&amp;x">Röm </a>'
+                      '<i><a href="/bible?ref=Rm&amp;x">3,16</a></i> und ', out)
+        self.assertIn('<p class="Joh 3,16">', out)
+        self.assertIn('<title>Röm 1,1</title>', out)
+        self.assertIn("<a href='/x'>Röm 3,16</a>", out)
+        self.assertIn('&amp; Mt 5,3</p>', out)
+        self.assertIn('<![CDATA[Vgl. Jes 40,3 <b>]]>', out)
+
+        # Without the links, the document is unchanged.
+        self.assertEqual(re.sub(r'<a href="/bible[^"]*">([^<]*)</a>', r"\1",
+                                out), document)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -26,10 +26,17 @@
 ##  I have added a copy of the GPL in the file COPYING
 
 from __future__ import print_function, unicode_literals
-import unittest
+import unittest, threading
 from bible_reference.bible_reference import (default_canon, BiblicalBook,
                                              NamingScheme, BibleReference,
+                                             BibleReferenceParser,
+                                             BibleReferenceParseError,
+                                             AmbiguousBookName,
                                              default_canon)
+from bible_reference.bible_reference import NO_MATCH, UNKNOWN_BOOK, \
+    AMBIGUOUS_BOOK, BAD_NUMBER, TRAILING_GARBAGE
+from bible_reference.naming_schemes import RGG_abbr, Luther84, SBL, \
+    SBL_abbr
 
 class InfoFileTests(unittest.TestCase):
     def test_canon(self):
@@ -99,6 +106,149 @@ class InfoFileTests(unittest.TestCase):
 
         self.assertEqual(BibleReference.parse("Gen 1,1").int_sort_index(),
                          1 << 16 | 1 << 8 | 1)
+
+    def test_abbreviations(self):
+        ns = NamingScheme.internal("RGG_abbr")
+        self.assertEqual(ns.intid_of(None, "ge"), "Gn")
+        self.assertEqual(ns.intid_of(None, "röm."), "Rm")
+        self.assertEqual(ns.intid_of("1", "KOR"), "1Cor")
+        self.assertEqual(ns.intid_of(None, "Jo"), "Jl") # exact beats prefix
+        self.assertRaises(KeyError, ns.intid_of, None, "Xyz")
+
+        with self.assertRaises(AmbiguousBookName) as cm:
+            ns.intid_of(None, "Je")
+        self.assertEqual(cm.exception.candidates, ("Is", "Jr",))
+
+        parser = BibleReferenceParser([ RGG_abbr, Luther84, ])
+        self.assertEqual(repr(parser.parse("Gene 1,1")), "<Gn 1:1 '1,1'>")
+        self.assertEqual(repr(parser.parse("Deut 6,4")), "<Dt 6:4 '6,4'>")
+        self.assertEqual(repr(parser.parse("Offenb. 21")),
+                         "<Rv 21:None '21'>")
+        self.assertRaises(BibleReferenceParseError, parser.parse, "Je 3")
+
+    def test_threads(self):
+        # Many threads hit the lazily built structures at once. Each
+        # must be built exactly once.
+        from bible_reference.naming_schemes import LazyNamingScheme
+        lazy = LazyNamingScheme("Luther84_abbr")
+        barrier = threading.Barrier(8)
+        results = []
+
+        def work():
+            barrier.wait()
+            results.append(( lazy.intid_of(None, "Offb."),
+                             id(lazy.naming_scheme),
+                             id(lazy.intid_by_name),
+                             id(lazy.prefix_trie), ))
+
+        threads = [ threading.Thread(target=work) for a in range(8) ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(results), 8)
+        self.assertEqual(len(set([ r[1:] for r in results ])), 1)
+        self.assertEqual(results[0][0], "Rv")
+        with self.assertRaises(TypeError):
+            lazy.intid_by_name[ (None, "X",) ] = "Rv"
+
+    def test_prewarm(self):
+        from bible_reference import prewarm, cached_parser
+        from bible_reference.naming_schemes import SBL_abbr
+
+        parser, = prewarm([ [ RGG_abbr, SBL_abbr, ], ], freeze=False)
+        self.assertIs(parser, cached_parser([ RGG_abbr, SBL_abbr, ]))
+        self.assertIsNot(parser, cached_parser([ SBL_abbr, RGG_abbr, ]))
+        self.assertIsNotNone(SBL_abbr.naming_scheme._intid_by_name)
+        self.assertIsNotNone(SBL_abbr.naming_scheme._prefix_trie)
+
+        # The cache doesn’t grow with naming schemes created per call.
+        from bible_reference import bible_reference
+        for i in range(bible_reference.parser_cache_size + 5):
+            BibleReference.parse("Joh 3,16",
+                                 [ NamingScheme.internal("RGG_abbr"), ])
+        self.assertEqual(len(bible_reference._parser_cache),
+                         bible_reference.parser_cache_size)
+
+        # The prewarmed parser is still there.
+        self.assertIs(parser, cached_parser([ RGG_abbr, SBL_abbr, ]))
+
+    def test_prefilter(self):
+        naming_schemes = [ RGG_abbr, Luther84, SBL, ]
+        plain = BibleReferenceParser(naming_schemes)
+        prefiltered = BibleReferenceParser(naming_schemes, prefilter=True)
+
+        s = ("Vgl. Röm 3,22 und 1. Kor 13,1-3 mit 2Kor 5,17 sowie 1 Sam 3,1-4,2 "
+             "und Joh 3,16f. In Song of Songs 2:3 and Joel 2, Gen 4 or "
+             "Generation 5 has no reference, Jesus Sirach 3,4 does.")
+
+        def spans(parser):
+            return [ (match.span(), match.groupdict(),)
+                     for match in parser._finditer_matches(s) ]
+
+        self.assertEqual(spans(plain), spans(prefiltered))
+        self.assertEqual(list(plain.finditer(s)),
+                         list(prefiltered.finditer(s)))
+        self.assertEqual(len(list(prefiltered.finditer(s))), 8)
+
+    def test_finditer_lazy(self):
+        parser = BibleReferenceParser([ RGG_abbr, Luther84, SBL, ],
+                                      prefilter=True)
+        s = ("Vgl. Röm 3,22 und 1. Kor 13,1-3 mit 2Kor 5,17 sowie "
+             "1 Sam 3,1-4,2 und Joh 3,16f. In Song of Songs 2:3 and Joel 2.")
+
+        matches = list(parser.finditer_lazy(s))
+        spans = list(parser.finditer_spans(s))
+        self.assertEqual(len(matches), len(spans))
+        for match, ( start, end, br, ) in zip(matches, spans):
+            self.assertEqual(( match.start, match.end, ), ( start, end, ))
+            self.assertEqual(( match.intid, match.chapter, match.verse,
+                               match.key, ),
+                             ( br.book.intid, br.chapter, br.verse,
+                               br.int_sort_index(), ))
+            self.assertEqual(match.reference(), br)
+
+        self.assertEqual(( matches[3].intid, matches[3].chapter,
+                           matches[3].verse, ), ( "1S", 3, 1, ))
+
+        # Books outside the canon have no key.
+        match, = BibleReferenceParser([ SBL_abbr, ]).finditer_lazy("Zeph 3:4")
+        self.assertEqual(( match.intid, match.key, ), ( "Hp", None, ))
+        self.assertEqual(match.reference().book.intid, "Hp")
+
+    def test_try_parse(self):
+        parser = BibleReferenceParser([ RGG_abbr, Luther84, ])
+
+        self.assertEqual(repr(parser.try_parse("Gene 1,1")), "<Gn 1:1 '1,1'>")
+        self.assertEqual(parser.parse_or_none("Röm 3,22 und"),
+                         parser.parse("Röm 3,22"))
+        self.assertIsNone(parser.parse_or_none("Xyz"))
+
+        def failure(s, strict=False):
+            ret = parser.try_parse(s, strict)
+            self.assertFalse(ret)
+            return ( ret.reason, ret.offset, )
+
+        self.assertEqual(failure("Hallo"), ( NO_MATCH, 5, ))
+        self.assertEqual(failure("Röm x"), ( NO_MATCH, 4, ))
+        self.assertEqual(failure("1. Kor (x), y"), ( NO_MATCH, 12, ))
+        self.assertEqual(failure("12"), ( NO_MATCH, 0, ))
+        self.assertEqual(failure("Xyz 3,1"), ( UNKNOWN_BOOK, 0, ))
+        self.assertEqual(failure("3 Kor 1"), ( UNKNOWN_BOOK, 2, ))
+        self.assertEqual(failure("Je 3"), ( AMBIGUOUS_BOOK, 0, ))
+        self.assertEqual(failure("1. K 3"), ( AMBIGUOUS_BOOK, 3, ))
+        self.assertEqual(parser.try_parse("Je 3").candidates, ("Is", "Jr",))
+        self.assertEqual(failure("Röm 3,0", True), ( BAD_NUMBER, 6, ))
+        self.assertEqual(failure("Ps 300", True), ( BAD_NUMBER, 3, ))
+        self.assertEqual(failure("Röm 3,22 und", True),
+                         ( TRAILING_GARBAGE, 8, ))
+        self.assertTrue(parser.try_parse("Röm 3,22 ", True))
+
+        # parse() still raises with the same messages.
+        with self.assertRaises(BibleReferenceParseError) as cm:
+            parser.parse("Xyz 3,1")
+        self.assertEqual(str(cm.exception), "Unknown book: None Xyz")
                                             
         
 if __name__ == '__main__':
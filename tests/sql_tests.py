@@ -0,0 +1,162 @@
+# -*- coding: utf-8; -*-
+
+##  Copyright 2018–20 by Diedrich Vorberg <diedrich@tux4web.de>
+##
+##  All Rights Reserved
+##
+##  For more Information on orm see the README file.
+##
+##  This program is free software; you can redistribute it and/or modify
+##  it under the terms of the GNU General Public License as published by
+##  the Free Software Foundation; either version 2 of the License, or
+##  (at your option) any later version.
+##
+##  This program is distributed in the hope that it will be useful,
+##  but WITHOUT ANY WARRANTY; without even the implied warranty of
+##  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##  GNU General Public License for more details.
+##
+##  You should have received a copy of the GNU General Public License
+##  along with this program; if not, write to the Free Software
+##  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+##
+##  I have added a copy of the GPL in the file COPYING
+
+
+from __future__ import print_function, unicode_literals
+import unittest, sqlite3, os, re, io, contextlib
+
+try:
+    import psycopg2
+except ImportError:
+    psycopg2 = None
+
+from bible_reference import canons, BibleReferenceParser
+from bible_reference.bible_reference import sort_index
+from bible_reference.naming_schemes import RGG_abbr, Luther84
+from bible_reference.sql import lookup_tables, sqlite_triggers, \
+    postgresql_function, postgresql_reference_re, _intid_lookup, main
+
+# A database test_postgresql() may create a schema in, like
+# "dbname=test".
+postgresql_dsn = os.environ.get("BIBREF_TEST_DSN")
+
+references = [ "Gen 1,1", "Gene 1,1", "1. Kor 13,4", "1Kor 13", "2 Kor 5,17",
+               "Offenb. 21", "Röm 3,22", "Ps 119,105", "Joh 3,16f",
+               "Jo 2,28", "Je 3", "Xyz 3", "Hallo", "Mt (5,3)", "Ps 23:1",
+               "1 Sam 3,1-4,2", "Röm", "Jes 40,3.10", "Joh 3, 16",
+               "gen 1,1", ]
+
+class SQLTests(unittest.TestCase):
+    def test_sqlite(self):
+        naming_schemes = [ RGG_abbr, Luther84, ]
+        conn = sqlite3.connect(":memory:")
+        for statement in lookup_tables(naming_schemes,
+                                       [ canons.default, canons.LXX, ]):
+            conn.execute(statement)
+
+        conn.execute("CREATE TABLE refs (reference TEXT)")
+        conn.executemany("INSERT INTO refs VALUES (?)",
+                         [ ( r, ) for r in references[:5] ])
+        for statement in sqlite_triggers("refs", "reference"):
+            conn.execute(statement)
+        conn.executemany("INSERT INTO refs (reference) VALUES (?)",
+                         [ ( r, ) for r in references[5:] ])
+        conn.execute("UPDATE refs SET reference = 'Ex 3,14' "
+                     " WHERE reference = 'Hallo'")
+
+        parser = BibleReferenceParser(naming_schemes)
+        rows = conn.execute("SELECT reference, bibref_key FROM refs").fetchall()
+        self.assertEqual(len(rows), len(references))
+        for reference, key in rows:
+            br = parser.parse_or_none(reference)
+            self.assertEqual(key, br and br.int_sort_index(), reference)
+
+        self.assertEqual(rows[-1], ( "gen 1,1", 65793, ))
+        self.assertEqual(rows[12], ( "Ex 3,14", 131854, ))
+        conn.close()
+
+    def test_sqlite_identifiers(self):
+        conn = sqlite3.connect(":memory:")
+        for statement in lookup_tables([ RGG_abbr, ], [ canons.default, ]):
+            conn.execute(statement)
+
+        conn.execute('CREATE TABLE "my ""refs""" ("the ""ref""" TEXT)')
+        for statement in sqlite_triggers('my "refs"', 'the "ref"',
+                                         'the "key"'):
+            conn.execute(statement)
+        conn.execute('INSERT INTO "my ""refs""" ("the ""ref""") '
+                     "VALUES ('Gen 1,1')")
+        self.assertEqual(conn.execute('SELECT "the ""key""" '
+                                      '  FROM "my ""refs"""').fetchall(),
+                         [ ( 65793, ), ])
+        conn.close()
+
+    def test_main(self):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            main([ "-d", "sqlite", ])
+        for canon in canons.bundled:
+            self.assertIn("VALUES ('%s', 'Gn', 0)" % canon.name,
+                          out.getvalue())
+
+    def test_postgresql_regex(self):
+        # bibref_key() with its regular expression in Python and the
+        # book looked up in SQLite.
+        regex = re.compile(postgresql_reference_re.replace(
+            "[[:alpha:]]", r"[^\W\d_]"))
+
+        naming_schemes = [ RGG_abbr, Luther84, ]
+        conn = sqlite3.connect(":memory:")
+        for statement in lookup_tables(naming_schemes, [ canons.default, ]):
+            conn.execute(statement)
+        query = ("SELECT b.position FROM bibref_books b"
+                 " WHERE b.canon = 'default' AND b.intid = %s" % (
+                     _intid_lookup(":o", ":w"), ))
+
+        parser = BibleReferenceParser(naming_schemes)
+        for reference in references:
+            key = None
+            match = regex.match(reference)
+            if match is not None:
+                row = conn.execute(query, { "o": match.group(1) or "",
+                                            "w": match.group(2).lower(),
+                                          }).fetchone()
+                if row is not None:
+                    key = sort_index(row[0], int(match.group(3)),
+                                     int(match.group(4) or 0))
+
+            br = parser.parse_or_none(reference)
+            self.assertEqual(key, br and br.int_sort_index(), reference)
+        conn.close()
+
+    @unittest.skipUnless(psycopg2 is not None and postgresql_dsn,
+                         "needs psycopg2 and BIBREF_TEST_DSN")
+    def test_postgresql(self):
+        naming_schemes = [ RGG_abbr, Luther84, ]
+        conn = psycopg2.connect(postgresql_dsn)
+        try:
+            cursor = conn.cursor()
+            cursor.execute("CREATE SCHEMA bibref_test")
+            for statement in lookup_tables(naming_schemes,
+                                           [ canons.default, ],
+                                           "bibref_test"):
+                cursor.execute(statement)
+            cursor.execute(postgresql_function("bibref_test"))
+
+            # As during a restore of pg_dump’s output.
+            cursor.execute("SET search_path = ''")
+
+            parser = BibleReferenceParser(naming_schemes)
+            for reference in references:
+                cursor.execute("SELECT bibref_test.bibref_key(%s)",
+                               ( reference, ))
+                br = parser.parse_or_none(reference)
+                self.assertEqual(cursor.fetchone()[0],
+                                 br and br.int_sort_index(), reference)
+        finally:
+            conn.rollback()
+            conn.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+# -*- coding: utf-8; -*-
+
+##  Copyright 2018–20 by Diedrich Vorberg <diedrich@tux4web.de>
+##
+##  All Rights Reserved
+##
+##  For more Information on orm see the README file.
+##
+##  This program is free software; you can redistribute it and/or modify
+##  it under the terms of the GNU General Public License as published by
+##  the Free Software Foundation; either version 2 of the License, or
+##  (at your option) any later version.
+##
+##  This program is distributed in the hope that it will be useful,
+##  but WITHOUT ANY WARRANTY; without even the implied warranty of
+##  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##  GNU General Public License for more details.
+##
+##  You should have received a copy of the GNU General Public License
+##  along with this program; if not, write to the Free Software
+##  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+##
+##  I have added a copy of the GPL in the file COPYING
+
+from __future__ import print_function, unicode_literals
+import unittest, sqlite3
+
+from bible_reference.bible_reference import BibleReference
+from bible_reference.naming_schemes import RGG_abbr, Luther84, SBL_abbr
+from bible_reference.sqlite import register_functions, end_key
+
+rows = [ "Röm 3,22", "Gen 1,1", "kein Bibelvers", "Ps 23", "Joh 3,16f",
+         "1Kor 13", "Joh 3,1-4,2", None, ]
+
+class SQLiteTests(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+        register_functions(self.conn, [ RGG_abbr, Luther84, ],
+                           output_scheme=SBL_abbr)
+        self.conn.execute("CREATE TABLE refs (reference TEXT)")
+        self.conn.executemany("INSERT INTO refs VALUES (?)",
+                              [ ( row, ) for row in rows ])
+
+    def tearDown(self):
+        self.conn.close()
+
+    def query(self, sql, *args):
+        return [ row[0] for row in self.conn.execute(sql, args) ]
+
+    def test_order(self):
+        self.conn.execute("CREATE INDEX refs_bibref "
+                          "ON refs(bibref_index(reference))")
+        self.assertEqual(
+            self.query("SELECT reference FROM refs "
+                       " WHERE bibref_index(reference) IS NOT NULL "
+                       " ORDER BY bibref_index(reference)"),
+            [ "Gen 1,1", "Ps 23", "Joh 3,1-4,2", "Joh 3,16f", "Röm 3,22",
+              "1Kor 13", ])
+
+        self.assertEqual(
+            self.query("SELECT bibref_normalize(reference) FROM refs "
+                       " WHERE reference LIKE 'Röm%'"), [ "Rom 3:22", ])
+
+    def test_span(self):
+        self.conn.execute("CREATE INDEX refs_span ON refs("
+                          "bibref_start(reference), bibref_end(reference))")
+
+        def overlapping(s):
+            br = BibleReference.parse(s, [ RGG_abbr, ])
+            return self.query("SELECT reference FROM refs "
+                              " WHERE bibref_start(reference) <= ? "
+                              "   AND bibref_end(reference) >= ? "
+                              " ORDER BY bibref_start(reference)",
+                              end_key(br), br.int_sort_index())
+
+        self.assertEqual(overlapping("Joh 3,17"), [ "Joh 3,1-4,2",
+                                                    "Joh 3,16f", ])
+        self.assertEqual(overlapping("Joh 4"), [ "Joh 3,1-4,2", ])
+        self.assertEqual(overlapping("1Kor 13,4"), [ "1Kor 13", ])
+        self.assertEqual(overlapping("Joh 5,1"), [])
+
+    def test_outside_canon(self):
+        # SBL_abbr’s Zeph is Hp, which is not part of the default canon.
+        conn = sqlite3.connect(":memory:")
+        register_functions(conn, [ SBL_abbr, ])
+        conn.execute("CREATE TABLE refs (reference TEXT)")
+        conn.execute("CREATE INDEX refs_bibref "
+                     "ON refs(bibref_index(reference))")
+        conn.execute("CREATE INDEX refs_span ON refs("
+                     "bibref_start(reference), bibref_end(reference))")
+        conn.executemany("INSERT INTO refs VALUES (?)",
+                         [ ( "Zeph 3:4", ), ( "Gen 1:1", ), ])
+        self.assertEqual(
+            conn.execute("SELECT bibref_index(reference), "
+                         "  bibref_end(reference), "
+                         "  bibref_normalize(reference) "
+                         "FROM refs ORDER BY rowid").fetchall(),
+            [ ( None, None, "Zeph 3:4", ),
+              ( 65793, 65793, "Gen 1:1", ), ])
+        conn.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+# -*- coding: utf-8; -*-
+
+##  Copyright 2018–20 by Diedrich Vorberg <diedrich@tux4web.de>
+##
+##  All Rights Reserved
+##
+##  For more Information on orm see the README file.
+##
+##  This program is free software; you can redistribute it and/or modify
+##  it under the terms of the GNU General Public License as published by
+##  the Free Software Foundation; either version 2 of the License, or
+##  (at your option) any later version.
+##
+##  This program is distributed in the hope that it will be useful,
+##  but WITHOUT ANY WARRANTY; without even the implied warranty of
+##  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##  GNU General Public License for more details.
+##
+##  You should have received a copy of the GNU General Public License
+##  along with this program; if not, write to the Free Software
+##  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+##
+##  I have added a copy of the GPL in the file COPYING
+
+
+import unittest, random
+from bible_reference import BibleReferenceParser, CanonMismatch
+from bible_reference.bible_reference import BibleReference, BiblicalBook
+from bible_reference.naming_schemes import RGG_abbr
+from bible_reference.canons import LXX
+from bible_reference.streams import merge, external_sort, sort_key
+
+parser = BibleReferenceParser([ RGG_abbr, ])
+references = [ parser.parse(s) for s in (
+    "Röm 3,1-4,2", "Gen 1,1", "Joh 3,16ff", "Gen 1,1", "Ps 23", "Mt 5,3-12",
+    "Ps 23,1", "Apk 21", "Gen 50,26", "Joh 1,1", "Röm 8,28", "Ex 3,14", ) ]
+
+def spans(references):
+    return [ ( repr(br), str(br), ) for br in references ]
+
+class StreamsTests(unittest.TestCase):
+    def test_merge(self):
+        a = sorted(references[:6], key=sort_key)
+        b = sorted(references[6:], key=sort_key)
+        self.assertEqual(spans(merge(a, b)),
+                         spans(sorted(references, key=sort_key)))
+
+    def test_external_sort(self):
+        rnd = random.Random(0)
+        data = [ rnd.choice(references) for a in range(1000) ]
+        expected = spans(sorted(data, key=sort_key))
+
+        # All in memory and with many runs on disk.
+        self.assertEqual(spans(external_sort(data)), expected)
+        self.assertEqual(spans(external_sort(iter(data), run_size=64)),
+                         expected)
+
+    def test_canon_mismatch(self):
+        other = BibleReference(BiblicalBook("Gn", LXX), 1, 1)
+        self.assertRaises(CanonMismatch, list,
+                          merge(references[:1], [ other, ]))
+        self.assertRaises(CanonMismatch, list,
+                          external_sort(references + [ other, ], run_size=5))
+
+
+if __name__ == '__main__':
+    unittest.main()
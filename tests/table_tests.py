@@ -0,0 +1,97 @@
+# -*- coding: utf-8; -*-
+
+##  Copyright 2018–20 by Diedrich Vorberg <diedrich@tux4web.de>
+##
+##  All Rights Reserved
+##
+##  For more Information on orm see the README file.
+##
+##  This program is free software; you can redistribute it and/or modify
+##  it under the terms of the GNU General Public License as published by
+##  the Free Software Foundation; either version 2 of the License, or
+##  (at your option) any later version.
+##
+##  This program is distributed in the hope that it will be useful,
+##  but WITHOUT ANY WARRANTY; without even the implied warranty of
+##  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##  GNU General Public License for more details.
+##
+##  You should have received a copy of the GNU General Public License
+##  along with this program; if not, write to the Free Software
+##  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+##
+##  I have added a copy of the GPL in the file COPYING
+
+import unittest, tempfile, os
+from bible_reference import BibleReferenceParser, CanonMismatch
+from bible_reference.bible_reference import BibleReference, BiblicalBook
+from bible_reference.naming_schemes import RGG_abbr
+from bible_reference.canons import LXX
+from bible_reference.table import ReferenceTable
+
+parser = BibleReferenceParser([ RGG_abbr, ])
+references = [ parser.parse(s) for s in ( "Röm 3,1-4,2", "Gen 1,1",
+                                          "Joh 3,16ff", "Gen 1,1", "Ps 23",
+                                          "Mt (5,1); 5,3-12", ) ]
+
+class ReferenceTableTests(unittest.TestCase):
+    def test_span_end(self):
+        self.assertEqual([ br.span_end for br in references ],
+                         [ (4, 2), (1, 1), (3, None), (1, 1), (23, None),
+                           (5, 12) ])
+        self.assertEqual(parser.parse("Joh 3,16f").span_end, (3, 17))
+        self.assertEqual(parser.parse("Röm 1-3").span_end, (3, None))
+
+    def test_table(self):
+        table = ReferenceTable.from_references(references,
+                                               naming_scheme=RGG_abbr)
+        self.assertEqual(len(table), 6)
+        self.assertEqual(list(table), references)
+        self.assertEqual(list(table[1:3]), references[1:3])
+        self.assertEqual(str(table[-1]), "Mt (5,1); 5,3–12")
+        self.assertEqual(list(table.sort_keys()),
+                         [ br.int_sort_index() for br in references ])
+
+        # Equal ranges are stored only once.
+        self.assertEqual(len(table.pool), len("3,1–4,2" "1,1" "3,16ff" "23"
+                                              "(5,1); 5,3–12".encode("utf-8")))
+
+        self.assertEqual([ br.book.intid for br in table.sorted() ],
+                         [ "Gn", "Gn", "Ps", "Mt", "Jn", "Rm", ])
+        self.assertEqual([ ( intid, len(group), )
+                           for intid, group in table.groupby_book() ],
+                         [ ("Gn", 2), ("Ps", 1), ("Mt", 1), ("Jn", 1),
+                           ("Rm", 1) ])
+
+        other = BibleReference(BiblicalBook("Gn", LXX), 1, 1)
+        self.assertRaises(CanonMismatch, table.append, other)
+
+    def test_serialization(self):
+        table = ReferenceTable.from_references(references)
+        data = table.tobytes()
+        self.assertEqual(len(data) % 8, 0)
+
+        copy = ReferenceTable.frombuffer(data)
+        self.assertIsInstance(copy.chapter, memoryview)
+        self.assertEqual(list(copy), references)
+
+        fd, path = tempfile.mkstemp()
+        try:
+            with os.fdopen(fd, "wb") as fp:
+                table.write(fp)
+
+            loaded = ReferenceTable.load(path)
+            self.assertIs(loaded.canon, table.canon)
+            self.assertEqual(list(loaded.sorted()), list(table.sorted()))
+
+            # Modifying a loaded table copies it.
+            loaded.append(references[0])
+            self.assertEqual(list(loaded), references + references[:1])
+        finally:
+            os.unlink(path)
+
+        self.assertRaises(IOError, ReferenceTable.frombuffer, b"x" * 32)
+
+
+if __name__ == '__main__':
+    unittest.main()